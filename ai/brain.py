@@ -3,16 +3,18 @@ import json
 import time
 import asyncio
 import re
-from difflib import SequenceMatcher
-from functools import lru_cache
-from typing import Optional, Tuple, Dict, List, Any
+from typing import Optional, Tuple, Dict, List, Any, Callable, Awaitable
 from dataclasses import dataclass
 import aiohttp
+import atexit
 import hashlib
+import logging
+from collections import OrderedDict
 
 from ai.history import load_history, add_entry, history_to_text
 from ai.facts import load_facts, add_fact, facts_to_text, set_user_name, get_user_name
-from ai import state, commands, knowledge
+from ai import state, commands, knowledge, faq_index, context, semantic
+from ai.cache import ResponseCache
 
 BASE_DIR = os.path.dirname(__file__)
 FAQ_PATH = os.getenv("FAUST_FAQ_PATH", os.path.join(BASE_DIR, "faq.json"))
@@ -20,6 +22,30 @@ FAQ_PATH = os.getenv("FAUST_FAQ_PATH", os.path.join(BASE_DIR, "faq.json"))
 OLLAMA_MODEL = os.getenv("FAUST_OLLAMA_MODEL", "gemma3:1b")
 OLLAMA_TIMEOUT = float(os.getenv("FAUST_OLLAMA_TIMEOUT", "30"))
 OLLAMA_URL = os.getenv("FAUST_OLLAMA_URL", "http://127.0.0.1:11434/api/generate")
+OLLAMA_STREAM = os.getenv("FAUST_OLLAMA_STREAM", "1") == "1"
+OLLAMA_KEEP_ALIVE = os.getenv("FAUST_OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_PREDICT = 500
+OLLAMA_CONCURRENCY = max(1, int(os.getenv("FAUST_OLLAMA_CONCURRENCY", "1")))
+
+EMBED_MODEL = os.getenv("FAUST_EMBED_MODEL", "nomic-embed-text")
+EMBED_URL = os.getenv("FAUST_EMBED_URL", "http://127.0.0.1:11434/api/embed")
+SEMANTIC_FAQ_THRESHOLD = float(os.getenv("FAUST_SEMANTIC_FAQ_THRESHOLD", "0.85"))
+
+CONTEXT_TOKENS = int(os.getenv("FAUST_CONTEXT_TOKENS", "2048"))
+PROMPT_BUDGET = CONTEXT_TOKENS - OLLAMA_NUM_PREDICT
+KNOWLEDGE_TOKENS = int(os.getenv("FAUST_KNOWLEDGE_TOKENS", "600"))
+USER_SECTION_TOKENS = 200
+HISTORY_TURN_TOKENS = 80
+REQUEST_TOKENS = 400
+
+CACHE_TTL = float(os.getenv("FAUST_CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("FAUST_CACHE_MAX_ENTRIES", "1000"))
+CACHE_MAX_BYTES = int(os.getenv("FAUST_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+CACHE_PATH = os.getenv("FAUST_CACHE_PATH", "")
+
+UpdateCallback = Callable[[str], Awaitable[None]]
+
+logger = logging.getLogger("faust_assistant")
 
 @dataclass
 class UserContext:
@@ -137,8 +163,12 @@ class EnhancedConversationMemory:
 conversation_memory = EnhancedConversationMemory()
 
 _session: aiohttp.ClientSession | None = None
-_response_cache: Dict[str, Tuple[str, float]] = {}
-_cache_ttl = 300
+_response_cache = ResponseCache(CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_PATH or None)
+_response_cache.load()
+
+_llm_slots = asyncio.Semaphore(OLLAMA_CONCURRENCY)
+_inflight: Dict[str, "asyncio.Task[str]"] = {}
+atexit.register(_response_cache.save)
 
 def get_cache_key(prompt: str, user_id: str, context_hash: str = "") -> str:
     base_key = f"{user_id}:{prompt.lower().strip()}"
@@ -154,59 +184,14 @@ async def get_session() -> aiohttp.ClientSession:
         _session = aiohttp.ClientSession(timeout=timeout, connector=connector)
     return _session
 
-@lru_cache(maxsize=1)
-def _load_faq_raw() -> dict:
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            with open(FAQ_PATH, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    return {}
-                return json.loads(content)
-        except:
-            if attempt == max_retries - 1:
-                return {}
-            time.sleep(0.1)
-    return {}
-
-faq_data = _load_faq_raw()
-
-@lru_cache(maxsize=4096)
-def _similarity(a: str, b: str) -> float:
-    a_clean = re.sub(r'[^\w\s]', '', a.lower().strip())
-    b_clean = re.sub(r'[^\w\s]', '', b.lower().strip())
-    
-    if a_clean == b_clean:
-        return 1.0
-    
-    a_words = set(a_clean.split())
-    b_words = set(b_clean.split())
-    
-    if not a_words or not b_words:
-        return 0.0
-    
-    intersection = len(a_words & b_words)
-    union = len(a_words | b_words)
-    
-    jaccard = intersection / union if union > 0 else 0.0
-    sequence = SequenceMatcher(None, a_clean, b_clean).ratio()
-    
-    return max(jaccard, sequence)
+faq = faq_index.FAQIndex(FAQ_PATH)
 
 def enhanced_local_match(prompt: str, user_context: UserContext) -> Tuple[Optional[str], float, Dict[str, Any]]:
-    if not faq_data:
+    faq.refresh()
+    if not faq.data:
         return None, 0.0, {}
     
-    prompt_clean = re.sub(r'[^\w\s]', '', prompt.lower().strip())
-    
-    exact_match = None
-    for q in faq_data.keys():
-        q_clean = re.sub(r'[^\w\s]', '', q.lower().strip())
-        if prompt_clean == q_clean:
-            exact_match = q
-            break
-    
+    exact_match = faq.exact(prompt)
     if exact_match:
         return exact_match, 1.0, {"match_type": "exact"}
     
@@ -216,8 +201,8 @@ def enhanced_local_match(prompt: str, user_context: UserContext) -> Tuple[Option
     
     user_style = user_context.facts.get('communication_style', 'нейтральный')
     
-    for question, answer in faq_data.items():
-        score = _similarity(prompt, question)
+    for question in faq.shortlist(prompt):
+        score = faq_index.similarity(prompt, question)
         
         context_boost = 0.0
         question_lower = question.lower()
@@ -234,6 +219,61 @@ def enhanced_local_match(prompt: str, user_context: UserContext) -> Tuple[Option
     
     return best_match, best_score, match_context
 
+_faq_vectors = semantic.VectorIndex("faq", EMBED_MODEL) if semantic.ENABLED else None
+_knowledge_vectors = semantic.VectorIndex("knowledge", EMBED_MODEL) if semantic.ENABLED else None
+
+async def _embed(texts: List[str]) -> List[List[float]]:
+    session = await get_session()
+    payload = {"model": EMBED_MODEL, "input": texts, "keep_alive": OLLAMA_KEEP_ALIVE}
+    async with session.post(EMBED_URL, json=payload, timeout=OLLAMA_TIMEOUT) as response:
+        response.raise_for_status()
+        data = await response.json()
+    return data.get("embeddings", [])
+
+def _sync_knowledge_vectors():
+    version = knowledge.knowledge_version()
+    if _knowledge_vectors.version == version:
+        return
+    items = {}
+    for category, entries in knowledge.get_all_knowledge().items():
+        for item in entries:
+            items[json.dumps([category, item], ensure_ascii=False)] = f"{category}: {item}"
+    _knowledge_vectors.sync(items, version)
+
+def _sync_faq_vectors():
+    if _faq_vectors.version == faq.version:
+        return
+    _faq_vectors.sync({question: question for question in faq.data}, faq.version)
+
+async def semantic_lookup(prompt: str) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    if _faq_vectors is None:
+        return None, []
+    
+    _sync_faq_vectors()
+    _faq_vectors.schedule(_embed)
+    _shared_prompt_prefix()
+    retrieve = _prompt_prefix["retrieve"]
+    if retrieve:
+        _sync_knowledge_vectors()
+        _knowledge_vectors.schedule(_embed)
+    
+    try:
+        vectors = await _embed([prompt])
+    except Exception:
+        return None, []
+    if not vectors:
+        return None, []
+    
+    question = None
+    hits = _faq_vectors.search(vectors[0], 1)
+    if hits and hits[0][1] >= SEMANTIC_FAQ_THRESHOLD and hits[0][0] in faq.data:
+        question = hits[0][0]
+    
+    items = []
+    if retrieve:
+        items = [tuple(json.loads(key)) for key, _ in _knowledge_vectors.search(vectors[0], knowledge.TOP_K)]
+    return question, items
+
 def robust_clean_response(text: str) -> str:
     if not text or not isinstance(text, str):
         return "Не совсем понял. Можете переформулировать?"
@@ -269,62 +309,73 @@ def robust_clean_response(text: str) -> str:
     return text
 
 def _check_cache(prompt: str, user_id: str, context_hash: str = "") -> Optional[str]:
-    cache_key = get_cache_key(prompt, user_id, context_hash)
-    now = time.time()
-    
-    if cache_key in _response_cache:
-        response, timestamp = _response_cache[cache_key]
-        if now - timestamp < _cache_ttl:
-            return response
-        else:
-            del _response_cache[cache_key]
-    
-    if len(_response_cache) > 1000:
-        oldest_keys = sorted(_response_cache.keys(), key=lambda k: _response_cache[k][1])[:100]
-        for key in oldest_keys:
-            del _response_cache[key]
-    
-    return None
+    return _response_cache.get(get_cache_key(prompt, user_id, context_hash))
 
 def _add_to_cache(prompt: str, user_id: str, response: str, context_hash: str = ""):
-    cache_key = get_cache_key(prompt, user_id, context_hash)
-    _response_cache[cache_key] = (response, time.time())
+    _response_cache.put(get_cache_key(prompt, user_id, context_hash), response)
 
-async def resilient_ollama_call(system_prompt: str, user_prompt: str, conversation_history: List, timeout: float = OLLAMA_TIMEOUT) -> str:
+def get_cache_stats() -> Dict[str, Any]:
+    return _response_cache.stats()
+
+async def _stream_ollama(session: aiohttp.ClientSession, payload: dict, timeout: float, on_update: UpdateCallback) -> str:
+    text = ""
+    async with session.post(OLLAMA_URL, json=payload, timeout=timeout) as response:
+        if response.status != 200:
+            return ""
+        async for line in response.content:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            token = data.get("response", "")
+            if token:
+                text += token
+                await on_update(text)
+            if data.get("done"):
+                break
+    return text.strip()
+
+async def resilient_ollama_call(system_prompt: str, user_prompt: str, conversation_history: List, timeout: float = OLLAMA_TIMEOUT, on_update: Optional[UpdateCallback] = None) -> str:
     max_retries = 2
     base_delay = 1.0
     
-    history_context = ""
-    if conversation_history:
-        recent = conversation_history[-4:]
-        history_lines = []
-        for h in recent:
-            user_msg = h.get('prompt', '').strip()
-            assistant_msg = h.get('response', '').strip()
-            if user_msg:
-                history_lines.append(f"П: {user_msg}")
-            if assistant_msg:
-                history_lines.append(f"О: {assistant_msg}")
-        if history_lines:
-            history_context = "\n".join(history_lines[-8:])
-    
-    strict_warning = """
-ВАЖНО: НИКОГДА не отвечай односложно! Запрещены ответы: 'Понял', 'Ясно', 'ОК', 'Хорошо', 'Ладно', 'Ага', 'Угу', 'Да', 'Нет'.
-Всегда давай развернутый ответ минимум из 2 предложений.
-"""
-    
-    full_prompt = f"{system_prompt}\n{strict_warning}"
-    if history_context:
-        full_prompt += f"\n\nИстория:\n{history_context}"
-    full_prompt += f"\n\nП: {user_prompt}\nО:"
+    history_lines = []
+    for h in (conversation_history or [])[-4:]:
+        user_msg = h.get('prompt', '').strip()
+        assistant_msg = h.get('response', '').strip()
+        if user_msg:
+            history_lines.append(f"П: {context.truncate(user_msg, HISTORY_TURN_TOKENS)}")
+        if assistant_msg:
+            history_lines.append(f"О: {context.truncate(assistant_msg, HISTORY_TURN_TOKENS)}")
+    
+    system, history, request = context.pack([
+        context.Section("system", system_prompt, priority=0),
+        context.Section("history", "\n".join(history_lines[-8:]), priority=2, keep_tail=True),
+        context.Section("request", user_prompt, priority=1, limit=REQUEST_TOKENS),
+    ], PROMPT_BUDGET)[0]
+    
+    full_prompt = system.text
+    if history.text:
+        full_prompt += f"\n\nИстория:\n{history.text}"
+    full_prompt += f"\n\nП: {request.text}\nО:"
+    
+    logger.info(
+        "Контекст Ollama: ~%d токенов (система %d, история %d, запрос %d)",
+        system.tokens + history.tokens + request.tokens, system.tokens, history.tokens, request.tokens
+    )
     
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": full_prompt,
-        "stream": False,
+        "stream": on_update is not None,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
         "options": {
             "temperature": 0.7,
-            "num_predict": 500,
+            "num_predict": OLLAMA_NUM_PREDICT,
+            "num_ctx": CONTEXT_TOKENS,
             "top_k": 40,
             "top_p": 0.9,
             "repeat_penalty": 1.1
@@ -334,12 +385,18 @@ async def resilient_ollama_call(system_prompt: str, user_prompt: str, conversati
     for attempt in range(max_retries):
         try:
             session = await get_session()
-            async with session.post(OLLAMA_URL, json=payload, timeout=timeout) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    response_text = data.get("response", "").strip()
+            async with _llm_slots:
+                if on_update is not None:
+                    response_text = await _stream_ollama(session, payload, timeout, on_update)
                     if response_text:
                         return response_text
+                else:
+                    async with session.post(OLLAMA_URL, json=payload, timeout=timeout) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            response_text = data.get("response", "").strip()
+                            if response_text:
+                                return response_text
         except:
             pass
         
@@ -411,24 +468,50 @@ async def enhanced_user_info_extraction(prompt: str, response: str, history: Lis
     
     return {"facts": facts}
 
-def build_adaptive_system_prompt(user_facts: str, history: List[Dict], user_id: str, is_owner: bool, user_name: str = "") -> str:
-    owner_name = state.get_owner_name()
-    user_context = conversation_memory.get_user_context(user_id)
-    
-    if history and time.time() - user_context.last_updated > 3600:
-        analysis = conversation_memory.analyze_conversation_patterns(history)
-        user_context.facts.update(analysis)
-        user_context.last_updated = time.time()
-    
+STATIC_PROMPT = "\n".join([
+    "Ты - полезный ассистент. Всегда давай развернутые и содержательные ответы.",
+    "НИКОГДА не отвечай односложно словами типа 'Понял', 'Ясно', 'ОК', 'Хорошо', 'Ладно', 'Ага', 'Угу'.",
+    "Даже если вопрос простой - дай информативный ответ.",
+    "Если соглашаешься с чем-то - объясни почему или предложи дальнейшие действия.",
+    "Если подтверждаешь что-то - добавь полезную информацию или уточняющий вопрос.",
+    "Отвечай развернуто, но по делу.",
+    "Минимальная длина ответа - 2 полноценных предложения.",
+    "Не придумывай информацию, если не уверен.",
+    "Если не знаешь ответа - честно скажи об этом и предложи помощь в другом.",
+    "Если узнал имя собеседника - используй его в ответах для персонализации.",
+    "Будь естественным в общении, как живой собеседник.",
+    "Всегда старайся добавить ценность в разговор, даже если вопрос кажется простым.",
+    "ВАЖНО: НИКОГДА не отвечай односложно! Запрещены ответы: 'Понял', 'Ясно', 'ОК', 'Хорошо', 'Ладно', 'Ага', 'Угу', 'Да', 'Нет'.",
+    "Всегда давай развернутый ответ минимум из 2 предложений.",
+])
+
+USER_SECTIONS_MAX = 256
+
+_prompt_prefix = {"version": None, "text": STATIC_PROMPT, "retrieve": False}
+_user_sections = OrderedDict()
+
+def _shared_prompt_prefix() -> str:
+    version = knowledge.knowledge_version()
+    if version != _prompt_prefix["version"]:
+        knowledge_text = knowledge.knowledge_to_text()
+        fits = context.estimate_tokens(knowledge_text) <= KNOWLEDGE_TOKENS
+        text = STATIC_PROMPT
+        if knowledge_text and fits:
+            text += f"\nБаза знаний: {knowledge_text}"
+        _prompt_prefix.update(version=version, text=text, retrieve=bool(knowledge_text) and not fits)
+    return _prompt_prefix["text"]
+
+def _relevant_knowledge(query: str, extra: List[Tuple[str, str]] = ()) -> str:
+    if not query or not _prompt_prefix["retrieve"]:
+        return ""
+    knowledge_text = knowledge.relevant_knowledge_text(query, extra=extra)
+    if not knowledge_text:
+        return ""
+    return f"База знаний (по теме запроса): {context.truncate(knowledge_text, KNOWLEDGE_TOKENS)}"
+
+def _render_user_sections(current_user_name: str, is_owner: bool, owner_name: str, user_name: str,
+                          user_facts: str, style: str, subjects: tuple, sentiment: str) -> str:
     parts = []
-    parts.append("Ты - полезный ассистент. Всегда давай развернутые и содержательные ответы.")
-    
-    parts.append("НИКОГДА не отвечай односложно словами типа 'Понял', 'Ясно', 'ОК', 'Хорошо', 'Ладно', 'Ага', 'Угу'.")
-    parts.append("Даже если вопрос простой - дай информативный ответ.")
-    parts.append("Если соглашаешься с чем-то - объясни почему или предложи дальнейшие действия.")
-    parts.append("Если подтверждаешь что-то - добавь полезную информацию или уточняющий вопрос.")
-    
-    current_user_name = get_user_name(user_id)
     if current_user_name:
         parts.append(f"ВАЖНО: Сейчас ты общаешься с {current_user_name}. Обязательно используй это имя в разговоре для персонализации.")
     
@@ -444,46 +527,80 @@ def build_adaptive_system_prompt(user_facts: str, history: List[Dict], user_id:
         if user_facts:
             parts.append(f"Дополнительная информация о собеседнике: {user_facts}")
         
-        if user_context.facts.get('communication_style'):
-            style = user_context.facts['communication_style']
-            if style == "формальный":
-                parts.append("Собеседник предпочитает формальное общение - используйте вежливую форму.")
-            elif style == "неформальный":
-                parts.append("Собеседник предпочитает неформальное общение - можно использовать более простой язык.")
-    
-    knowledge_text = knowledge.knowledge_to_text()
-    if knowledge_text:
-        parts.append(f"База знаний: {knowledge_text}")
-    
-    if user_context.facts.get('preferred_subjects'):
-        subjects = ", ".join(user_context.facts['preferred_subjects'][:3])
-        parts.append(f"Ранее собеседник интересовался: {subjects}")
-    
-    if user_context.facts.get('sentiment_trend'):
-        sentiment = user_context.facts['sentiment_trend']
-        if sentiment == "позитивный":
-            parts.append("Собеседник в хорошем настроении.")
-        elif sentiment == "негативный":
-            parts.append("Собеседник расстроен - будь особенно тактичен и поддерживающим.")
-    
-    parts.extend([
-        "Отвечай развернуто, но по делу.",
-        "Минимальная длина ответа - 2 полноценных предложения.",
-        "Не придумывай информацию, если не уверен.",
-        "Если не знаешь ответа - честно скажи об этом и предложи помощь в другом.",
-        "Если узнал имя собеседника - используй его в ответах для персонализации.",
-        "Будь естественным в общении, как живой собеседник.",
-        "Всегда старайся добавить ценность в разговор, даже если вопрос кажется простым."
-    ])
+        if style == "формальный":
+            parts.append("Собеседник предпочитает формальное общение - используйте вежливую форму.")
+        elif style == "неформальный":
+            parts.append("Собеседник предпочитает неформальное общение - можно использовать более простой язык.")
+    
+    if subjects:
+        parts.append(f"Ранее собеседник интересовался: {', '.join(subjects)}")
+    
+    if sentiment == "позитивный":
+        parts.append("Собеседник в хорошем настроении.")
+    elif sentiment == "негативный":
+        parts.append("Собеседник расстроен - будь особенно тактичен и поддерживающим.")
     
     return "\n".join(parts)
 
-async def analyze(prompt: str, user_id: str, timeout: float = OLLAMA_TIMEOUT, user_display_name: str = "") -> str:
+def _user_prompt_sections(user_id: str, *key) -> str:
+    cached = _user_sections.get(user_id)
+    if cached is not None and cached[0] == key:
+        _user_sections.move_to_end(user_id)
+        return cached[1]
+    
+    text = context.truncate(_render_user_sections(*key), USER_SECTION_TOKENS)
+    _user_sections[user_id] = (key, text)
+    _user_sections.move_to_end(user_id)
+    while len(_user_sections) > USER_SECTIONS_MAX:
+        _user_sections.popitem(last=False)
+    return text
+
+def build_adaptive_system_prompt(user_facts: str, history: List[Dict], user_id: str, is_owner: bool, user_name: str = "",
+                                 current_user_name: Optional[str] = None, query: str = "",
+                                 extra_knowledge: List[Tuple[str, str]] = ()) -> str:
+    user_context = conversation_memory.get_user_context(user_id)
+    
+    if history and time.time() - user_context.last_updated > 3600:
+        analysis = conversation_memory.analyze_conversation_patterns(history)
+        user_context.facts.update(analysis)
+        user_context.last_updated = time.time()
+    
+    if current_user_name is None:
+        current_user_name = get_user_name(user_id)
+    
+    user_text = _user_prompt_sections(
+        user_id,
+        current_user_name,
+        is_owner,
+        state.get_owner_name() if is_owner else "",
+        user_name,
+        user_facts,
+        user_context.facts.get('communication_style', ""),
+        tuple(user_context.facts.get('preferred_subjects', [])[:3]),
+        user_context.facts.get('sentiment_trend', ""),
+    )
+    
+    parts = [_shared_prompt_prefix(), user_text, _relevant_knowledge(query, extra_knowledge)]
+    return "\n".join(part for part in parts if part)
+
+def _context_hash(user_id: str, is_owner_user: bool) -> str:
+    return hashlib.md5(f"{user_id}_{is_owner_user}".encode()).hexdigest()[:8]
+
+async def analyze(prompt: str, user_id: str, timeout: float = OLLAMA_TIMEOUT, user_display_name: str = "", on_update: Optional[UpdateCallback] = None) -> str:
+    key = get_cache_key(prompt, user_id, _context_hash(user_id, state.is_owner(user_id)))
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_analyze(prompt, user_id, timeout, user_display_name, on_update))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _inflight.pop(key, None) if _inflight.get(key) is done else None)
+    return await asyncio.shield(task)
+
+async def _analyze(prompt: str, user_id: str, timeout: float, user_display_name: str, on_update: Optional[UpdateCallback]) -> str:
     try:
         uid = user_id
         is_owner_user = state.is_owner(uid)
         
-        context_hash = hashlib.md5(f"{uid}_{is_owner_user}".encode()).hexdigest()[:8]
+        context_hash = _context_hash(uid, is_owner_user)
         cached = _check_cache(prompt, uid, context_hash)
         if cached:
             return cached
@@ -525,7 +642,7 @@ async def analyze(prompt: str, user_id: str, timeout: float = OLLAMA_TIMEOUT, us
             add_entry(uid, prompt, resp_state)
             return resp_state
         
-        handled_cmd, resp_cmd = await commands.process_command(prompt, uid)
+        handled_cmd, resp_cmd = await commands.process_command(prompt, uid, on_update)
         if handled_cmd:
             add_entry(uid, prompt, resp_cmd)
             _add_to_cache(prompt, uid, resp_cmd, context_hash)
@@ -534,8 +651,14 @@ async def analyze(prompt: str, user_id: str, timeout: float = OLLAMA_TIMEOUT, us
         user_context = conversation_memory.get_user_context(uid)
         q, score, match_info = enhanced_local_match(prompt, user_context)
         
+        semantic_knowledge = []
+        if not (q and score >= 0.75):
+            semantic_q, semantic_knowledge = await semantic_lookup(prompt)
+            if semantic_q:
+                q, score = semantic_q, 1.0
+        
         if q and score >= 0.75:
-            resp_text = faq_data.get(q, "")
+            resp_text = faq.data.get(q, "")
             if resp_text:
                 add_entry(uid, prompt, resp_text)
                 _add_to_cache(prompt, uid, resp_text, context_hash)
@@ -552,19 +675,22 @@ async def analyze(prompt: str, user_id: str, timeout: float = OLLAMA_TIMEOUT, us
             current_user_name = ""
         
         display_name = current_user_name or user_display_name
-        system_prompt = build_adaptive_system_prompt(facts_text, history_entries, uid, is_owner_user, display_name)
+        system_prompt = build_adaptive_system_prompt(
+            facts_text, history_entries, uid, is_owner_user, display_name, current_user_name, prompt, semantic_knowledge
+        )
+        stream_update = on_update if OLLAMA_STREAM else None
         
-        raw_response = await resilient_ollama_call(system_prompt, prompt, history_entries, timeout)
+        raw_response = await resilient_ollama_call(system_prompt, prompt, history_entries, timeout, stream_update)
         resp_text = robust_clean_response(raw_response)
         
         if len(resp_text.split()) <= 4 and any(word in resp_text.lower() for word in ['понял', 'ясно', 'ок', 'хорошо', 'ладно']):
             stricter_system_prompt = system_prompt + "\n\nВАЖНО: Ответ должен быть развернутым минимум 2-3 предложениями. Запрещены односложные ответы!"
-            raw_response = await resilient_ollama_call(stricter_system_prompt, prompt, history_entries, timeout)
+            raw_response = await resilient_ollama_call(stricter_system_prompt, prompt, history_entries, timeout, stream_update)
             resp_text = robust_clean_response(raw_response)
         
         if not resp_text or resp_text == "Не совсем понял. Можете переформулировать?":
             if score >= 0.6:
-                resp_text = faq_data.get(q, "Не могу найти подходящий ответ в базе знаний. Можете уточнить вопрос?")
+                resp_text = faq.data.get(q, "Не могу найти подходящий ответ в базе знаний. Можете уточнить вопрос?")
             else:
                 resp_text = "Извините, не совсем понял ваш вопрос. Можете переформулировать его или задать более конкретно?"
         
@@ -595,6 +721,7 @@ async def enhanced_user_info_update(uid, prompt, resp_text, history_entries):
 
 async def resilient_cleanup():
     global _session
+    _response_cache.save()
     if _session and not _session.closed:
         try:
             await asyncio.wait_for(_session.close(), timeout=5.0)
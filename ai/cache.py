@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict, Any
+
+logger = logging.getLogger("faust_assistant")
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int = 1000, max_bytes: int = 0, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self._data: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and time.time() - entry[1] < self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, created, _ = entry
+        if time.time() - created >= self.ttl:
+            self._pop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str, created: Optional[float] = None):
+        if key in self._data:
+            self._pop(key)
+
+        size = len(value.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        self._data[key] = (value, created or time.time(), size)
+        self.bytes += size
+        self._purge_expired()
+        self._enforce_budget()
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def _pop(self, key: str):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def _purge_expired(self):
+        now = time.time()
+        while self._data:
+            key, (_, created, _) = next(iter(self._data.items()))
+            if now - created < self.ttl:
+                break
+            self._pop(key)
+            self.expirations += 1
+
+    def _enforce_budget(self):
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes and self.bytes > self.max_bytes)
+        ):
+            key = next(iter(self._data))
+            self._pop(key)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.warning("Не удалось загрузить кэш ответов %s: %s", self.path, e)
+            return 0
+
+        now = time.time()
+        loaded = 0
+        for item in entries if isinstance(entries, list) else []:
+            try:
+                key, value, created = item
+            except (TypeError, ValueError):
+                continue
+            if now - created < self.ttl:
+                self.put(key, value, created)
+                loaded += 1
+        return loaded
+
+    def save(self) -> bool:
+        if not self.path:
+            return False
+        now = time.time()
+        entries = [
+            [key, value, created]
+            for key, (value, created, _) in self._data.items()
+            if now - created < self.ttl
+        ]
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            return True
+        except Exception as e:
+            logger.warning("Не удалось сохранить кэш ответов %s: %s", self.path, e)
+            return False
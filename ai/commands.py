@@ -1,19 +1,44 @@
+import os
 import re
 import asyncio
-from typing import Tuple, Union, List, Optional
-from telethon import TelegramClient, types
+from datetime import datetime, timedelta, timezone
+from contextvars import ContextVar
+from typing import Tuple, Union, List, Optional, Callable, Awaitable, Iterable, Dict
+from telethon import TelegramClient, types, utils, errors
 from telethon.tl.functions.channels import LeaveChannelRequest, JoinChannelRequest, GetFullChannelRequest
 from telethon.tl.functions.messages import GetFullChatRequest, CreateChatRequest, ExportChatInviteRequest
 from telethon.tl.functions.contacts import BlockRequest, UnblockRequest, DeleteContactsRequest
 from telethon.tl.functions.account import UpdateProfileRequest, UpdateUsernameRequest
 from telethon.tl.functions.photos import UploadProfilePhotoRequest, DeletePhotosRequest
 from telethon.tl.types import InputPeerEmpty, InputPhoneContact, UserStatusOnline, UserStatusOffline
+from telethon.tl.types import (
+    InputMessagesFilterPhotos, InputMessagesFilterVideo, InputMessagesFilterVoice,
+    InputMessagesFilterDocument, InputMessagesFilterUrl, InputMessagesFilterRoundVideo,
+)
+from ai.state import is_owner, get_owner_id, set_owner_id
+from ai.dialogs import DialogIndex
+from ai import export
+
+SEARCH_SCOPE = os.getenv("FAUST_SEARCH_SCOPE", "global")
+SEARCH_LIMIT = int(os.getenv("FAUST_SEARCH_LIMIT", "8"))
+SEARCH_DIALOGS = int(os.getenv("FAUST_SEARCH_DIALOGS", "50"))
+SEARCH_PER_DIALOG = int(os.getenv("FAUST_SEARCH_PER_DIALOG", "2"))
+SEARCH_CONCURRENCY = int(os.getenv("FAUST_SEARCH_CONCURRENCY", "4"))
+MAX_FLOOD_WAIT = int(os.getenv("FAUST_MAX_FLOOD_WAIT", "30"))
+PURGE_LIMIT = int(os.getenv("FAUST_PURGE_LIMIT", "100"))
+PURGE_CHUNK = 100
+EXPORT_LIMIT = int(os.getenv("FAUST_EXPORT_LIMIT", "1000"))
+
+UpdateCallback = Callable[[str], Awaitable[None]]
 
 _client: TelegramClient | None = None
+_dialogs = DialogIndex()
+_on_update: ContextVar[Optional[UpdateCallback]] = ContextVar("on_update", default=None)
 
 def init(client: TelegramClient):
     global _client
     _client = client
+    _dialogs.attach(client)
     
     async def set_bot_as_owner():
         try:
@@ -26,12 +51,18 @@ def init(client: TelegramClient):
     
     client.loop.create_task(set_bot_as_owner())
 
+async def _refresh_dialogs():
+    try:
+        await _dialogs.build(_client)
+    except Exception as e:
+        print(f"Ошибка построения индекса диалогов: {e}")
+
 async def _resolve_entity(identifier: str) -> Optional[types.TypeInputPeer]:
     if not _client:
         return None
 
     identifier = identifier.strip()
-    
+
     attempts = [
         lambda: _client.get_input_entity(identifier),
         lambda: _client.get_entity(int(identifier) if identifier.isdigit() else identifier),
@@ -43,20 +74,11 @@ async def _resolve_entity(identifier: str) -> Optional[types.TypeInputPeer]:
         except:
             continue
     
-    async for dialog in _client.iter_dialogs():
-        dialog_name = dialog.name or ""
-        dialog_username = getattr(dialog.entity, 'username', '')
-        
-        search_targets = [
-            dialog_name.lower(),
-            dialog_username.lower(),
-            str(getattr(dialog.entity, 'id', ''))
-        ]
-        
-        if any(identifier.lower() in target for target in search_targets if target):
-            return dialog.entity
-    
-    return None
+    if _dialogs.is_stale():
+        await _refresh_dialogs()
+
+    entry = _dialogs.exact(identifier) or _dialogs.containing(identifier)
+    return entry.input_peer() if entry is not None else None
 
 async def _get_entity_details(entity):
     try:
@@ -68,344 +90,507 @@ async def _get_entity_details(entity):
     except:
         return None
 
-async def process_command(prompt: str, sender_id: Union[int, str] = None) -> Tuple[bool, str]:
-    if not _client:
-        return False, "Клиент не инициализирован."
-
-    if sender_id is not None and not is_owner(sender_id):
-        return True, "Отказано в доступе. Только владельцу доступны команды."
-
-    text = prompt.strip().lower()
-    original_text = prompt.strip()
-
-    if re.search(r"(удали|стереть|убрать)\s+(диалог|чат|беседу)?\s*(?:с|из|у)?\s*(.+)", text) or \
-       re.search(r"(delete|remove)\s+(chat|dialog)?\s*(.+)", text):
-        match = re.search(r"(удали|стереть|убрать|delete|remove)\s+(диалог|чат|беседу|chat|dialog)?\s*(?:с|из|у)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Чат '{target}' не найден."
-        try:
-            await _client.delete_dialog(entity)
-            return True, f"Чат '{target}' успешно удалён."
-        except Exception as e:
-            return True, f"Ошибка удаления: {str(e)}"
-
-    if re.search(r"(очисти|почисти|удали|стереть)\s*(все|мои)?\s*(сообщения|месседжи)?\s*(?:в|из|от)?\s*(.+)", text) or \
-       re.search(r"(clear|clean)\s*(my|all)?\s*(messages)?\s*(.+)", text):
-        match = re.search(r"(очисти|почисти|удали|стереть|clear|clean)\s*(все|мои|my|all)?\s*(сообщения|месседжи|messages)?\s*(?:в|из|от)?\s*(.+)", text)
-        target = match.group(4) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Чат '{target}' не найден."
-        try:
-            deleted_count = 0
-            async for msg in _client.iter_messages(entity, from_user="me"):
-                await msg.delete()
-                deleted_count += 1
-                if deleted_count >= 100:
-                    break
-            return True, f"Удалено {deleted_count} сообщений в '{target}'."
-        except Exception as e:
-            return True, f"Ошибка очистки: {str(e)}"
-
-    if re.search(r"(отпишись|покинуть|выйти|leave|unsubscribe)\s*(?:из|от|from)?\s*(канала|чата|группы|channel|chat|group)?\s*(.+)", text):
-        match = re.search(r"(отпишись|покинуть|выйти|leave|unsubscribe)\s*(?:из|от|from)?\s*(канала|чата|группы|channel|chat|group)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Чат '{target}' не найден."
+async def _report(text: str):
+    on_update = _on_update.get()
+    if on_update is not None:
         try:
-            await _client(LeaveChannelRequest(entity))
-            return True, f"Успешно отписан от '{target}'."
-        except Exception as e:
-            return True, f"Ошибка отписки: {str(e)}"
+            await on_update(text)
+        except Exception:
+            pass
 
-    if re.search(r"(подпишись|вступи|присоединись|join|subscribe)\s*(?:в|на|to)?\s*(канал|чат|группу|channel|chat|group)?\s*(.+)", text):
-        match = re.search(r"(подпишись|вступи|присоединись|join|subscribe)\s*(?:в|на|to)?\s*(канал|чат|группу|channel|chat|group)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
-        
+async def _with_flood_wait(func, *args, attempts: int = 3):
+    for attempt in range(attempts):
         try:
-            entity = await _client.get_entity(target)
-            await _client(JoinChannelRequest(entity))
-            chat_title = getattr(entity, 'title', target)
-            return True, f"Успешно подписан на '{chat_title}'."
-        except Exception as e:
-            return True, f"Ошибка подписки: {str(e)}"
-
-    if re.search(r"(архив|архивируй|разархив|разархивируй)\s*(чат)?\s*(.+)", text):
-        match = re.search(r"(архив|архивируй|разархив|разархивируй)\s*(чат)?\s*(.+)", text)
-        action = match.group(1) if match else ""
-        target = match.group(3) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Чат '{target}' не найден."
-        
-        try:
-            if action.startswith('архив'):
-                await _client.archive(entity)
-                return True, f"Чат '{target}' архивирован."
+            return await func(*args)
+        except errors.FloodWaitError as e:
+            if e.seconds > MAX_FLOOD_WAIT or attempt == attempts - 1:
+                raise
+            await asyncio.sleep(e.seconds + 1)
+
+async def _delete_dialog(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Чат '{target}' не найден."
+    try:
+        await _client.delete_dialog(entity)
+        _dialogs.remove(utils.get_peer_id(entity))
+        return True, f"Чат '{target}' успешно удалён."
+    except Exception as e:
+        return True, f"Ошибка удаления: {str(e)}"
+
+_PURGE_FILTERS = {
+    "фото": InputMessagesFilterPhotos,
+    "видео": InputMessagesFilterVideo,
+    "голосовые": InputMessagesFilterVoice,
+    "кружки": InputMessagesFilterRoundVideo,
+    "файлы": InputMessagesFilterDocument,
+    "ссылки": InputMessagesFilterUrl,
+    "photos": InputMessagesFilterPhotos,
+    "videos": InputMessagesFilterVideo,
+    "voice": InputMessagesFilterVoice,
+    "files": InputMessagesFilterDocument,
+    "links": InputMessagesFilterUrl,
+}
+_PURGE_UNITS = {
+    "мин": timedelta(minutes=1),
+    "час": timedelta(hours=1),
+    "ч": timedelta(hours=1),
+    "д": timedelta(days=1),
+    "нед": timedelta(weeks=1),
+    "min": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "w": timedelta(weeks=1),
+}
+_PURGE_COUNT_RE = re.compile(r"\s+(?:последние|last)\s+(\d+)$")
+_PURGE_PERIOD_RE = re.compile(r"\s+(?:за|for)\s+(?:(\d+)\s*)?(мин|час|ч|д|нед|min|h|d|w)\w*$")
+_PURGE_TODAY_RE = re.compile(r"\s+(?:за\s+сегодня|today)$")
+_PURGE_KIND_RE = re.compile(r"\s+(?:только|only)\s+(текст|text|" + "|".join(_PURGE_FILTERS) + r")$")
+
+def _parse_purge_options(target: str) -> Tuple[str, dict]:
+    options = {"limit": None, "min_date": None, "message_filter": None, "text_only": False}
+    while True:
+        match = _PURGE_COUNT_RE.search(target)
+        if match:
+            options["limit"] = int(match.group(1))
+        elif (match := _PURGE_TODAY_RE.search(target)):
+            now = datetime.now(timezone.utc).astimezone()
+            options["min_date"] = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        elif (match := _PURGE_PERIOD_RE.search(target)):
+            options["min_date"] = datetime.now(timezone.utc) - int(match.group(1) or 1) * _PURGE_UNITS[match.group(2)]
+        elif (match := _PURGE_KIND_RE.search(target)):
+            kind = match.group(1)
+            if kind in ("текст", "text"):
+                options["text_only"] = True
             else:
-                await _client.unarchive(entity)
-                return True, f"Чат '{target}' разархивирован."
-        except Exception as e:
-            return True, f"Ошибка архивации: {str(e)}"
+                options["message_filter"] = _PURGE_FILTERS[kind]
+        else:
+            return target.strip(), options
+        target = target[:match.start()]
+
+async def _delete_chunk(entity, ids: List[int]) -> int:
+    await _with_flood_wait(_client.delete_messages, entity, ids)
+    return len(ids)
+
+async def purge_messages(entity, limit: Optional[int] = PURGE_LIMIT, min_date: Optional[datetime] = None,
+                         message_filter=None, text_only: bool = False, on_progress: Optional[UpdateCallback] = None) -> int:
+    deleted = 0
+    collected = 0
+    chunk: List[int] = []
+    pending = None
+
+    async def flush(ids):
+        nonlocal deleted, pending
+        if pending is not None:
+            deleted += await pending
+            if on_progress is not None:
+                await on_progress(deleted)
+        pending = asyncio.ensure_future(_delete_chunk(entity, ids)) if ids else None
 
-    if re.search(r"(закрепи|прикрепи|открепи|сними)\s*(сообщение)?\s*(?:в|from)?\s*(.+)", text):
-        match = re.search(r"(закрепи|прикрепи|открепи|сними)\s*(сообщение)?\s*(?:в|from)?\s*(.+)", text)
-        action = match.group(1) if match else ""
-        target = match.group(3) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Чат '{target}' не найден."
-        
-        try:
-            if action in ['закрепи', 'прикрепи']:
-                async for message in _client.iter_messages(entity, from_user="me", limit=1):
-                    await message.pin()
-                    return True, f"Сообщение закреплено в '{target}'."
-                return True, "Не найдено сообщений для закрепления."
-            else:
-                await _client.unpin_message(entity)
-                return True, f"Сообщение откреплено в '{target}'."
-        except Exception as e:
-            return True, f"Ошибка закрепления: {str(e)}"
+    try:
+        async for message in _client.iter_messages(entity, from_user="me", filter=message_filter):
+            if min_date is not None and message.date < min_date:
+                break
+            if text_only and (message.photo or message.document):
+                continue
+            chunk.append(message.id)
+            collected += 1
+            if len(chunk) >= PURGE_CHUNK:
+                await flush(chunk)
+                chunk = []
+            if limit and collected >= limit:
+                break
+        await flush(chunk)
+        await flush([])
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+    return deleted
+
+async def _clear_messages(match: re.Match, text: str) -> Tuple[bool, str]:
+    target, options = _parse_purge_options(match.group(4))
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Чат '{target}' не найден."
 
-    if re.search(r"(найди|поищи|find|search)\s*(сообщения|messages)?\s*(?:с|with)?\s*(.+)", text):
-        match = re.search(r"(найди|поищи|find|search)\s*(сообщения|messages)?\s*(?:с|with)?\s*(.+)", text)
-        query = match.group(3) if match else text.split()[-1]
-        
-        try:
-            results = []
-            async for dialog in _client.iter_dialogs(limit=15):
-                async for message in _client.iter_messages(dialog.entity, search=query, limit=2):
-                    chat_name = dialog.name or "Unknown"
-                    text_preview = message.text[:40] + "..." if message.text and len(message.text) > 40 else message.text
-                    results.append(f"• {chat_name}: {text_preview}")
-                    if len(results) >= 8:
-                        break
-                if len(results) >= 8:
-                    break
-            
-            if results:
-                return True, f"Найдено по запросу '{query}':\n" + "\n".join(results)
-            else:
-                return True, f"По запросу '{query}' ничего не найдено."
-        except Exception as e:
-            return True, f"Ошибка поиска: {str(e)}"
+    explicit_limit = options["limit"] is not None
+    if not explicit_limit:
+        options["limit"] = PURGE_LIMIT
 
-    if re.search(r"(статус|bio|status)\s*(установи|сделай|set)?\s*(.+)", text):
-        match = re.search(r"(статус|bio|status)\s*(установи|сделай|set)?\s*(.+)", text)
-        bio_text = match.group(3) if match else " ".join(text.split()[1:])
-        
-        try:
-            await _client(UpdateProfileRequest(about=bio_text))
-            return True, f"Статус обновлён: {bio_text}"
-        except Exception as e:
-            return True, f"Ошибка обновления статуса: {str(e)}"
+    async def progress(count: int):
+        await _report(f"Удаляю сообщения в '{target}': {count}...")
 
-    if re.search(r"(имя|name)\s*(установи|смени|set|change)\s*(.+)", text):
-        match = re.search(r"(имя|name)\s*(установи|смени|set|change)\s*(.+)", text)
-        name_parts = match.group(3).split() if match else text.split()[1:]
-        
-        if len(name_parts) >= 2:
-            first_name, last_name = name_parts[0], " ".join(name_parts[1:])
+    try:
+        deleted_count = await purge_messages(entity, on_progress=progress, **options)
+        if not explicit_limit and deleted_count >= PURGE_LIMIT:
+            return True, (
+                f"Удалено {deleted_count} сообщений в '{target}' (лимит по умолчанию). "
+                f"Чтобы удалить больше, укажите количество: 'последние N'."
+            )
+        return True, f"Удалено {deleted_count} сообщений в '{target}'."
+    except Exception as e:
+        return True, f"Ошибка очистки: {str(e)}"
+
+async def _leave_chat(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Чат '{target}' не найден."
+    try:
+        await _client(LeaveChannelRequest(entity))
+        _dialogs.remove(utils.get_peer_id(entity))
+        return True, f"Успешно отписан от '{target}'."
+    except Exception as e:
+        return True, f"Ошибка отписки: {str(e)}"
+
+async def _join_chat(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    
+    try:
+        entity = await _client.get_entity(target)
+        await _client(JoinChannelRequest(entity))
+        chat_title = getattr(entity, 'title', target)
+        return True, f"Успешно подписан на '{chat_title}'."
+    except Exception as e:
+        return True, f"Ошибка подписки: {str(e)}"
+
+async def _archive_chat(match: re.Match, text: str) -> Tuple[bool, str]:
+    action = match.group(1)
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Чат '{target}' не найден."
+    
+    try:
+        if action.startswith('архив'):
+            await _client.archive(entity)
+            return True, f"Чат '{target}' архивирован."
         else:
-            first_name, last_name = name_parts[0], ""
-        
+            await _client.unarchive(entity)
+            return True, f"Чат '{target}' разархивирован."
+    except Exception as e:
+        return True, f"Ошибка архивации: {str(e)}"
+
+async def _pin_message(match: re.Match, text: str) -> Tuple[bool, str]:
+    action = match.group(1)
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Чат '{target}' не найден."
+    
+    try:
+        if action in ['закрепи', 'прикрепи']:
+            async for message in _client.iter_messages(entity, from_user="me", limit=1):
+                await message.pin()
+                return True, f"Сообщение закреплено в '{target}'."
+            return True, "Не найдено сообщений для закрепления."
+        else:
+            await _client.unpin_message(entity)
+            return True, f"Сообщение откреплено в '{target}'."
+    except Exception as e:
+        return True, f"Ошибка закрепления: {str(e)}"
+
+async def _collect_messages(entity, query: str, limit: int) -> list:
+    return [message async for message in _client.iter_messages(entity, search=query, limit=limit)]
+
+class _SearchResults:
+    def __init__(self, query: str, limit: int):
+        self.query = query
+        self.limit = limit
+        self.lines = []
+        self._seen = set()
+
+    @property
+    def full(self) -> bool:
+        return len(self.lines) >= self.limit
+
+    def add(self, chat_name: str, message) -> bool:
+        key = (message.chat_id, message.id)
+        if self.full or key in self._seen:
+            return False
+        self._seen.add(key)
+        text_preview = message.text[:40] + "..." if message.text and len(message.text) > 40 else message.text
+        self.lines.append(f"• {chat_name}: {text_preview}")
+        return True
+
+    def render(self) -> str:
+        if self.lines:
+            return f"Найдено по запросу '{self.query}':\n" + "\n".join(self.lines)
+        return f"По запросу '{self.query}' ничего не найдено."
+
+def _chat_name(message) -> str:
+    if message.chat is not None:
+        return utils.get_display_name(message.chat) or "Unknown"
+    entry = _dialogs.entries.get(message.chat_id)
+    return entry.title if entry else "Unknown"
+
+async def _search_global(results: _SearchResults):
+    messages = await _with_flood_wait(_collect_messages, None, results.query, results.limit)
+    if any([results.add(_chat_name(message), message) for message in messages]):
+        await _report(results.render())
+
+async def _search_targets(limit: int) -> list:
+    if _dialogs.is_stale():
+        await _refresh_dialogs()
+    if _dialogs.entries:
+        entries = sorted(_dialogs.entries.values(), key=lambda entry: entry.rank, reverse=True)
+        return [(entry.input_peer(), entry.title) for entry in entries[:limit]]
+    return [(dialog.input_entity, dialog.name or "Unknown") async for dialog in _client.iter_dialogs(limit=limit)]
+
+async def _search_dialogs(results: _SearchResults):
+    semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+    async def search_one(peer, chat_name: str):
+        async with semaphore:
+            if results.full:
+                return
+            messages = await _with_flood_wait(_collect_messages, peer, results.query, SEARCH_PER_DIALOG)
+        if any([results.add(chat_name, message) for message in messages]):
+            await _report(results.render())
+
+    targets = await _search_targets(SEARCH_DIALOGS)
+    outcomes = await asyncio.gather(
+        *(search_one(peer, chat_name) for peer, chat_name in targets),
+        return_exceptions=True
+    )
+    failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if failures and not results.lines:
+        raise failures[0]
+
+async def search_messages(query: str, scope: str = SEARCH_SCOPE, limit: int = SEARCH_LIMIT) -> str:
+    results = _SearchResults(query, limit)
+    if scope == "global":
         try:
-            await _client(UpdateProfileRequest(first_name=first_name, last_name=last_name))
-            return True, f"Имя обновлено: {first_name} {last_name}"
-        except Exception as e:
-            return True, f"Ошибка обновления имени: {str(e)}"
+            await _search_global(results)
+            return results.render()
+        except errors.RPCError:
+            pass
+    await _search_dialogs(results)
+    return results.render()
 
-    if re.search(r"(юзернейм|username)\s*(установи|смени|set)\s*(@?\w+)", text):
-        match = re.search(r"(юзернейм|username)\s*(установи|смени|set)\s*(@?)(\w+)", text)
-        username = match.group(4) if match else text.split()[-1].lstrip('@')
-        
-        try:
-            await _client(UpdateUsernameRequest(username))
-            return True, f"Юзернейм обновлён: @{username}"
-        except Exception as e:
-            return True, f"Ошибка обновления юзернейма: {str(e)}"
+async def _search_messages(match: re.Match, text: str) -> Tuple[bool, str]:
+    query = match.group(3)
 
-    if re.search(r"(инфо|информация|info)\s*(о|about|про)?\s*(.+)", text):
-        match = re.search(r"(инфо|информация|info)\s*(о|about|про)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Объект '{target}' не найден."
-        
-        try:
-            full_entity = await _client.get_entity(entity)
-            info_lines = [f"Информация о '{target}':"]
-            
-            if hasattr(full_entity, 'title'):
-                info_lines.append(f"Название: {full_entity.title}")
-            if hasattr(full_entity, 'username'):
-                info_lines.append(f"Юзернейм: @{full_entity.username}")
-            if hasattr(full_entity, 'id'):
-                info_lines.append(f"ID: {full_entity.id}")
-            if hasattr(full_entity, 'participants_count'):
-                info_lines.append(f"Участников: {full_entity.participants_count}")
-            if hasattr(full_entity, 'broadcast'):
-                info_lines.append(f"Тип: {'Канал' if full_entity.broadcast else 'Группа'}")
-            
-            return True, "\n".join(info_lines)
-        except Exception as e:
-            return True, f"Ошибка получения информации: {str(e)}"
+    try:
+        return True, await search_messages(query)
+    except Exception as e:
+        return True, f"Ошибка поиска: {str(e)}"
 
-    if re.search(r"(мо[яё]|my)\s*(инфо|информация|аккаунт|info|account)", text):
-        try:
-            me = await _client.get_me()
-            info_lines = ["👤 Информация о вашем аккаунте:"]
-            
-            if me.first_name:
-                info_lines.append(f"Имя: {me.first_name}")
-            if me.last_name:
-                info_lines.append(f"Фамилия: {me.last_name}")
-            if me.username:
-                info_lines.append(f"Юзернейм: @{me.username}")
-            info_lines.append(f"ID: {me.id}")
-            info_lines.append(f"Premium: {'Да' if me.premium else 'Нет'}")
-            info_lines.append(f"Бот: {'Да' if me.bot else 'Нет'}")
-            
-            return True, "\n".join(info_lines)
-        except Exception as e:
-            return True, f"Ошибка получения информации: {str(e)}"
+async def _set_bio(match: re.Match, text: str) -> Tuple[bool, str]:
+    bio_text = match.group(3)
+    
+    try:
+        await _client(UpdateProfileRequest(about=bio_text))
+        return True, f"Статус обновлён: {bio_text}"
+    except Exception as e:
+        return True, f"Ошибка обновления статуса: {str(e)}"
 
-    if re.search(r"(список|лист|диалоги|dialogs|chats)\s*(групп|каналов|всех)?", text):
-        match = re.search(r"(список|лист|диалоги|dialogs|chats)\s*(групп|каналов|всех)?", text)
-        filter_type = match.group(2) if match else ""
-        
-        try:
-            dialogs = []
-            async for dialog in _client.iter_dialogs(limit=25):
-                if filter_type == "групп" and not dialog.is_group:
-                    continue
-                if filter_type == "каналов" and not dialog.is_channel:
-                    continue
-                
-                dialog_info = f"• {dialog.name}"
-                if dialog.unread_count:
-                    dialog_info += f" ({dialog.unread_count} непрочитанных)"
-                dialogs.append(dialog_info)
-            
-            if dialogs:
-                title = "Последние диалоги"
-                if filter_type:
-                    title += f" ({filter_type})"
-                return True, title + ":\n" + "\n".join(dialogs[:15])
-            else:
-                return True, "Диалоги не найдены."
-        except Exception as e:
-            return True, f"Ошибка получения списка: {str(e)}"
+async def _set_name(match: re.Match, text: str) -> Tuple[bool, str]:
+    name_parts = match.group(3).split()
+    
+    if len(name_parts) >= 2:
+        first_name, last_name = name_parts[0], " ".join(name_parts[1:])
+    else:
+        first_name, last_name = name_parts[0], ""
+    
+    try:
+        await _client(UpdateProfileRequest(first_name=first_name, last_name=last_name))
+        return True, f"Имя обновлено: {first_name} {last_name}"
+    except Exception as e:
+        return True, f"Ошибка обновления имени: {str(e)}"
 
-    if re.search(r"(заблокируй|блок|block)\s*(пользователя|user)?\s*(.+)", text):
-        match = re.search(r"(заблокируй|блок|block)\s*(пользователя|user)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
+async def _set_username(match: re.Match, text: str) -> Tuple[bool, str]:
+    username = match.group(4)
+    
+    try:
+        await _client(UpdateUsernameRequest(username))
+        return True, f"Юзернейм обновлён: @{username}"
+    except Exception as e:
+        return True, f"Ошибка обновления юзернейма: {str(e)}"
+
+async def _entity_info(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Объект '{target}' не найден."
+    
+    try:
+        full_entity = await _client.get_entity(entity)
+        info_lines = [f"Информация о '{target}':"]
         
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Пользователь '{target}' не найден."
+        if hasattr(full_entity, 'title'):
+            info_lines.append(f"Название: {full_entity.title}")
+        if hasattr(full_entity, 'username'):
+            info_lines.append(f"Юзернейм: @{full_entity.username}")
+        if hasattr(full_entity, 'id'):
+            info_lines.append(f"ID: {full_entity.id}")
+        if hasattr(full_entity, 'participants_count'):
+            info_lines.append(f"Участников: {full_entity.participants_count}")
+        if hasattr(full_entity, 'broadcast'):
+            info_lines.append(f"Тип: {'Канал' if full_entity.broadcast else 'Группа'}")
         
-        try:
-            await _client(BlockRequest(entity))
-            return True, f"Пользователь '{target}' заблокирован."
-        except Exception as e:
-            return True, f"Ошибка блокировки: {str(e)}"
+        return True, "\n".join(info_lines)
+    except Exception as e:
+        return True, f"Ошибка получения информации: {str(e)}"
 
-    if re.search(r"(разблокируй|разблок|unblock)\s*(пользователя|user|человека|чела)?\s*(.+)", text):
-        match = re.search(r"(разблокируй|разблок|unblock)\s*(пользователя|user|человека|чела)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
+async def _my_info(match: re.Match, text: str) -> Tuple[bool, str]:
+    try:
+        me = await _client.get_me()
+        info_lines = ["👤 Информация о вашем аккаунте:"]
         
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Пользователь '{target}' не найден."
+        if me.first_name:
+            info_lines.append(f"Имя: {me.first_name}")
+        if me.last_name:
+            info_lines.append(f"Фамилия: {me.last_name}")
+        if me.username:
+            info_lines.append(f"Юзернейм: @{me.username}")
+        info_lines.append(f"ID: {me.id}")
+        info_lines.append(f"Premium: {'Да' if me.premium else 'Нет'}")
+        info_lines.append(f"Бот: {'Да' if me.bot else 'Нет'}")
         
-        try:
-            await _client(UnblockRequest(entity))
-            return True, f"Пользователь '{target}' разблокирован."
-        except Exception as e:
-            return True, f"Ошибка разблокировки: {str(e)}"
-
-    if re.search(r"(прочитай|отметь)\s*(все|всё|all)\s*(как\s*)?прочитанн?ы?е?", text):
-        try:
-            await _client.mark_as_read()
-            return True, "Все чаты отмечены как прочитанные."
-        except Exception as e:
-            return True, f"Ошибка: {str(e)}"
+        return True, "\n".join(info_lines)
+    except Exception as e:
+        return True, f"Ошибка получения информации: {str(e)}"
 
-    if re.search(r"(создай|create)\s*(группу|chat)\s*(.+?)", text):
-        match = re.search(r"(создай|create)\s*(группу|chat)\s*(.+)", text)
-        group_name = match.group(3) if match else "Новая группа"
+async def _list_dialogs(match: re.Match, text: str) -> Tuple[bool, str]:
+    filter_type = match.group(2)
+    
+    try:
+        dialogs = []
+        async for dialog in _client.iter_dialogs(limit=25):
+            if filter_type == "групп" and not dialog.is_group:
+                continue
+            if filter_type == "каналов" and not dialog.is_channel:
+                continue
+            
+            dialog_info = f"• {dialog.name}"
+            if dialog.unread_count:
+                dialog_info += f" ({dialog.unread_count} непрочитанных)"
+            dialogs.append(dialog_info)
         
-        try:
-            result = await _client(CreateChatRequest([], group_name))
-            return True, f"Группа '{group_name}' создана."
-        except Exception as e:
-            return True, f"Ошибка создания группы: {str(e)}"
+        if dialogs:
+            title = "Последние диалоги"
+            if filter_type:
+                title += f" ({filter_type})"
+            return True, title + ":\n" + "\n".join(dialogs[:15])
+        else:
+            return True, "Диалоги не найдены."
+    except Exception as e:
+        return True, f"Ошибка получения списка: {str(e)}"
 
-    if re.search(r"(экспорт|выгрузи|export)\s*(историю|чат|history)?\s*(.+)", text):
-        match = re.search(r"(экспорт|выгрузи|export)\s*(историю|чат|history)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Чат '{target}' не найден."
-        
-        try:
-            messages = []
-            async for message in _client.iter_messages(entity, limit=20):
-                sender = await message.get_sender()
-                sender_name = getattr(sender, 'first_name', 'Unknown')
-                messages.append(f"{sender_name}: {message.text}")
-            
-            if messages:
-                preview = "\n".join(messages[:5])
-                return True, f"Последние сообщения из '{target}':\n{preview}"
-            else:
-                return True, f"В чате '{target}' нет сообщений."
-        except Exception as e:
-            return True, f"Ошибка экспорта: {str(e)}"
+async def _block_user(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Пользователь '{target}' не найден."
+    
+    try:
+        await _client(BlockRequest(entity))
+        return True, f"Пользователь '{target}' заблокирован."
+    except Exception as e:
+        return True, f"Ошибка блокировки: {str(e)}"
 
-    if re.search(r"(онлайн|статус|online)\s*(пользователя|user)?\s*(.+)", text):
-        match = re.search(r"(онлайн|статус|online)\s*(пользователя|user)?\s*(.+)", text)
-        target = match.group(3) if match else text.split()[-1]
-        
-        entity = await _resolve_entity(target)
-        if not entity:
-            return True, f"Пользователь '{target}' не найден."
-        
-        try:
-            user = await _client.get_entity(entity)
-            if hasattr(user, 'status'):
-                if isinstance(user.status, UserStatusOnline):
-                    status = "В сети"
-                elif isinstance(user.status, UserStatusOffline):
-                    from datetime import datetime
-                    last_seen = user.status.was_online.strftime("%d.%m.%Y %H:%M")
-                    status = f"Был в сети: {last_seen}"
-                else:
-                    status = f"Статус: {type(user.status).__name__}"
-                
-                return True, f"{getattr(user, 'first_name', 'User')} - {status}"
+async def _unblock_user(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Пользователь '{target}' не найден."
+    
+    try:
+        await _client(UnblockRequest(entity))
+        return True, f"Пользователь '{target}' разблокирован."
+    except Exception as e:
+        return True, f"Ошибка разблокировки: {str(e)}"
+
+async def _read_all(match: re.Match, text: str) -> Tuple[bool, str]:
+    try:
+        await _client.mark_as_read()
+        return True, "Все чаты отмечены как прочитанные."
+    except Exception as e:
+        return True, f"Ошибка: {str(e)}"
+
+async def _create_group(match: re.Match, text: str) -> Tuple[bool, str]:
+    group_name = match.group(3)
+    
+    try:
+        result = await _client(CreateChatRequest([], group_name))
+        return True, f"Группа '{group_name}' создана."
+    except Exception as e:
+        return True, f"Ошибка создания группы: {str(e)}"
+
+_EXPORT_OPTION_RE = re.compile(r"\s+(?:(в|in)\s+html|(с|with)\s+(?:медиа|media)|(?:последние|last)\s+(\d+))$")
+
+async def _export_history(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    with_media, with_html, limit = False, False, EXPORT_LIMIT
+    while (option := _EXPORT_OPTION_RE.search(target)):
+        if option.group(1):
+            with_html = True
+        elif option.group(2):
+            with_media = True
+        else:
+            limit = int(option.group(3))
+        target = target[:option.start()]
+    target = target.strip()
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Чат '{target}' не найден."
+    
+    try:
+        exporter = await export.export_chat(
+            _client, entity, target,
+            with_media=with_media, with_html=with_html, on_progress=_report, limit=limit
+        )
+        if not exporter.count:
+            return True, f"В чате '{target}' нет сообщений."
+        summary = f"Экспорт '{target}' готов: {exporter.count} сообщений, {exporter.media_count} файлов"
+        if exporter.media_errors:
+            summary += f" (не скачано: {exporter.media_errors})"
+        return True, summary + ". Архив отправлен в Избранное."
+    except Exception as e:
+        return True, f"Ошибка экспорта: {str(e)}"
+
+async def _user_status(match: re.Match, text: str) -> Tuple[bool, str]:
+    target = match.group(3)
+    
+    entity = await _resolve_entity(target)
+    if not entity:
+        return True, f"Пользователь '{target}' не найден."
+    
+    try:
+        user = await _client.get_entity(entity)
+        if hasattr(user, 'status'):
+            if isinstance(user.status, UserStatusOnline):
+                status = "В сети"
+            elif isinstance(user.status, UserStatusOffline):
+                from datetime import datetime
+                last_seen = user.status.was_online.strftime("%d.%m.%Y %H:%M")
+                status = f"Был в сети: {last_seen}"
             else:
-                return True, f"Не удалось получить статус пользователя."
-        except Exception as e:
-            return True, f"Ошибка получения статуса: {str(e)}"
+                status = f"Статус: {type(user.status).__name__}"
+            
+            return True, f"{getattr(user, 'first_name', 'User')} - {status}"
+        else:
+            return True, f"Не удалось получить статус пользователя."
+    except Exception as e:
+        return True, f"Ошибка получения статуса: {str(e)}"
 
-    if re.search(r"(помощь|help|команды|commands)", text):
-        help_text = """
+async def _help(match: re.Match, text: str) -> Tuple[bool, str]:
+    help_text = """
 **Управление чатами:**
 `удали чат [название/юзернейм/ID]` - Удалить диалог
 `очисти сообщения в [чат]` - Очистить ваши сообщения
+`очисти сообщения в [чат] последние 500 / за 2 часа / только фото` - Очистить с фильтром
 `отпишись от [канал]` - Выйти из канала/группы
 `подпишись на [юзернейм]` - Подписаться на канал
 `архивируй [чат]` - Архивировать чат
@@ -431,10 +616,147 @@ async def process_command(prompt: str, sender_id: Union[int, str] = None) -> Tup
 `заблокируй [пользователь]` - Блокировка
 `разблокируй [пользователь]` - Разблокировка
 `создай группу [название]` - Создать группу
-`экспорт [чат]` - Экспорт истории
+`экспорт чат [чат]` - Экспорт последних сообщений в архив (можно добавить `последние 5000`, `в html`, `с медиа`)
 
 *можно использовать названия, юзернеймы (@username) или ID*
-        """
-        return True, help_text.strip()
+    """
+    return True, help_text.strip()
+
+IntentHandler = Callable[[re.Match, str], Awaitable[Tuple[bool, str]]]
+
+class Intent:
+    __slots__ = ("name", "pattern", "handler", "keywords", "rank")
+
+    def __init__(self, name: str, pattern, handler: IntentHandler, keywords: Iterable[str], rank: tuple):
+        self.name = name
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.handler = handler
+        self.keywords = tuple(keywords)
+        self.rank = rank
+
+class IntentTable:
+    def __init__(self):
+        self.intents: Dict[str, Intent] = {}
+        self._fallback: List[Intent] = []
+        self._by_keyword: Dict[str, set] = {}
+        self._scanner = None
+        self._order = 0
+
+    def register(self, name: str, pattern, handler: IntentHandler, keywords: Iterable[str] = (), priority: int = 0) -> Intent:
+        self._order += 1
+        intent = Intent(name, pattern, handler, keywords, (-priority, self._order))
+        self.intents[name] = intent
+        self._rebuild()
+        return intent
+
+    def unregister(self, name: str) -> bool:
+        if self.intents.pop(name, None) is None:
+            return False
+        self._rebuild()
+        return True
+
+    def _rebuild(self):
+        self._fallback = [intent for intent in self.intents.values() if not intent.keywords]
+        by_keyword: Dict[str, set] = {}
+        for intent in self.intents.values():
+            for keyword in intent.keywords:
+                by_keyword.setdefault(keyword, set()).add(intent)
+
+        for keyword, owners in by_keyword.items():
+            for other, other_owners in by_keyword.items():
+                if other != keyword and keyword.startswith(other):
+                    owners |= other_owners
+        self._by_keyword = by_keyword
+
+        if by_keyword:
+            alternation = "|".join(re.escape(k) for k in sorted(by_keyword, key=len, reverse=True))
+            self._scanner = re.compile(f"(?=({alternation}))")
+        else:
+            self._scanner = None
+
+    def candidates(self, text: str) -> List[Intent]:
+        found = set(self._fallback)
+        if self._scanner is not None:
+            for hit in self._scanner.finditer(text):
+                found |= self._by_keyword[hit.group(1)]
+        return sorted(found, key=lambda intent: intent.rank)
+
+    def match(self, text: str) -> Tuple[Optional[Intent], Optional[re.Match]]:
+        for intent in self.candidates(text):
+            match = intent.pattern.search(text)
+            if match:
+                return intent, match
+        return None, None
+
+INTENTS = IntentTable()
+
+def register_intent(name: str, pattern, handler: IntentHandler, keywords: Iterable[str] = (), priority: int = 0) -> Intent:
+    return INTENTS.register(name, pattern, handler, keywords, priority)
+
+def unregister_intent(name: str) -> bool:
+    return INTENTS.unregister(name)
+
+_BUILTIN_INTENTS = [
+    ("delete_dialog", r"(удали|стереть|убрать|delete|remove)\s+(диалог|чат|беседу|chat|dialog)?\s*(?:с|из|у)?\s*(.+)",
+     _delete_dialog, ("удали", "стереть", "убрать", "delete", "remove")),
+    ("clear_messages", r"(очисти|почисти|удали|стереть|clear|clean)\s*(все|мои|my|all)?\s*(сообщения|месседжи|messages)?\s*(?:в|из|от)?\s*(.+)",
+     _clear_messages, ("очисти", "почисти", "удали", "стереть", "clear", "clean")),
+    ("leave_chat", r"(отпишись|покинуть|выйти|leave|unsubscribe)\s*(?:из|от|from)?\s*(канала|чата|группы|channel|chat|group)?\s*(.+)",
+     _leave_chat, ("отпишись", "покинуть", "выйти", "leave", "unsubscribe")),
+    ("join_chat", r"(подпишись|вступи|присоединись|join|subscribe)\s*(?:в|на|to)?\s*(канал|чат|группу|channel|chat|group)?\s*(.+)",
+     _join_chat, ("подпишись", "вступи", "присоединись", "join", "subscribe")),
+    ("archive_chat", r"(архив|архивируй|разархив|разархивируй)\s*(чат)?\s*(.+)",
+     _archive_chat, ("архив", "разархив")),
+    ("pin_message", r"(закрепи|прикрепи|открепи|сними)\s*(сообщение)?\s*(?:в|from)?\s*(.+)",
+     _pin_message, ("закрепи", "прикрепи", "открепи", "сними")),
+    ("search_messages", r"(найди|поищи|find|search)\s*(сообщения|messages)?\s*(?:с|with)?\s*(.+)",
+     _search_messages, ("найди", "поищи", "find", "search")),
+    ("set_bio", r"(статус|bio|status)\s*(установи|сделай|set)?\s*(.+)",
+     _set_bio, ("статус", "bio", "status")),
+    ("set_name", r"(имя|name)\s*(установи|смени|set|change)\s*(.+)",
+     _set_name, ("имя", "name")),
+    ("set_username", r"(юзернейм|username)\s*(установи|смени|set)\s*(@?)(\w+)",
+     _set_username, ("юзернейм", "username")),
+    ("entity_info", r"(инфо|информация|info)\s*(о|about|про)?\s*(.+)",
+     _entity_info, ("инфо", "info")),
+    ("my_info", r"(мо[яё]|my)\s*(инфо|информация|аккаунт|info|account)",
+     _my_info, ("моя", "моё", "my")),
+    ("list_dialogs", r"(список|лист|диалоги|dialogs|chats)\s*(групп|каналов|всех)?",
+     _list_dialogs, ("список", "лист", "диалоги", "dialogs", "chats")),
+    ("block_user", r"(заблокируй|блок|block)\s*(пользователя|user)?\s*(.+)",
+     _block_user, ("заблокируй", "блок", "block")),
+    ("unblock_user", r"(разблокируй|разблок|unblock)\s*(пользователя|user|человека|чела)?\s*(.+)",
+     _unblock_user, ("разблок", "unblock")),
+    ("read_all", r"(прочитай|отметь)\s*(все|всё|all)\s*(как\s*)?прочитанн?ы?е?",
+     _read_all, ("прочитай", "отметь")),
+    ("create_group", r"(создай|create)\s*(группу|chat)\s*(.+)",
+     _create_group, ("создай", "create")),
+    ("export_history", r"^(экспорт|выгрузи|export)\s+(историю|чат|history|chat)\s+(.+)",
+     _export_history, ("экспорт", "выгрузи", "export")),
+    ("user_status", r"(онлайн|статус|online)\s*(пользователя|user)?\s*(.+)",
+     _user_status, ("онлайн", "статус", "online")),
+    ("help", r"(помощь|help|команды|commands)",
+     _help, ("помощь", "help", "команды", "commands")),
+]
+
+for _name, _pattern, _handler, _keywords in _BUILTIN_INTENTS:
+    register_intent(_name, _pattern, _handler, _keywords)
+
+async def process_command(prompt: str, sender_id: Union[int, str] = None, on_update: Optional[UpdateCallback] = None) -> Tuple[bool, str]:
+    if not _client:
+        return False, "Клиент не инициализирован."
+
+    if sender_id is not None and not is_owner(sender_id):
+        return True, "Отказано в доступе. Только владельцу доступны команды."
 
-    return False, ""
\ No newline at end of file
+    text = prompt.strip().lower()
+
+    intent, match = INTENTS.match(text)
+    if intent is None:
+        return False, ""
+
+    token = _on_update.set(on_update)
+    try:
+        return await intent.handler(match, text)
+    finally:
+        _on_update.reset(token)
@@ -0,0 +1,76 @@
+import re
+from typing import List, Tuple
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+CHARS_PER_SUBWORD = 4
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // CHARS_PER_SUBWORD for piece in _PIECE_RE.findall(text))
+
+def _cut_words(text: str, max_tokens: int, keep_tail: bool) -> str:
+    words = text.split(" ")
+    if keep_tail:
+        words.reverse()
+    kept, used = [], 0
+    for word in words:
+        cost = estimate_tokens(word)
+        if used + cost > max_tokens:
+            break
+        kept.append(word)
+        used += cost
+    if keep_tail:
+        kept.reverse()
+        return "… " + " ".join(kept) if kept else ""
+    return " ".join(kept) + " …" if kept else ""
+
+def truncate(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    if keep_tail:
+        lines.reverse()
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(_cut_words(line, max_tokens, keep_tail))
+            break
+        kept.append(line)
+        used += cost
+    if keep_tail:
+        kept.reverse()
+    return "\n".join(kept)
+
+class Section:
+    __slots__ = ("name", "text", "priority", "limit", "keep_tail", "tokens")
+
+    def __init__(self, name: str, text: str, priority: int = 0, limit: int = 0, keep_tail: bool = False):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.keep_tail = keep_tail
+        self.text = truncate(text, limit, keep_tail) if limit else text
+        self.tokens = estimate_tokens(self.text)
+
+    def shrink(self, max_tokens: int):
+        self.text = truncate(self.text, max_tokens, self.keep_tail)
+        self.tokens = estimate_tokens(self.text)
+
+def pack(sections: List[Section], budget: int) -> Tuple[List[Section], int]:
+    total = sum(section.tokens for section in sections)
+    for section in sorted(sections, key=lambda s: -s.priority):
+        if total <= budget:
+            break
+        if section.priority == 0:
+            continue
+        before = section.tokens
+        section.shrink(max(0, before - (total - budget)))
+        total -= before - section.tokens
+    return sections, total
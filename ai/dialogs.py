@@ -0,0 +1,252 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+from telethon import events, utils
+from telethon.tl.types import User, Chat, Channel, InputPeerUser, InputPeerChat, InputPeerChannel
+
+logger = logging.getLogger("faust_assistant")
+
+BASE_DIR = os.path.dirname(__file__)
+DIALOGS_FILE = os.path.join(BASE_DIR, "dialogs.json")
+
+SAVE_DELAY = 5.0
+REBUILD_INTERVAL = float(os.getenv("FAUST_DIALOGS_REBUILD", str(24 * 3600)))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def normalize(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall((text or "").lower().replace("ё", "е")))
+
+class DialogEntry:
+    __slots__ = ("peer_id", "kind", "id", "access_hash", "title", "username", "tokens", "rank")
+
+    def __init__(self, peer_id: int, kind: str, id: int, access_hash: Optional[int], title: str, username: str, rank: float = 0.0):
+        self.peer_id = peer_id
+        self.kind = kind
+        self.id = id
+        self.access_hash = access_hash
+        self.title = title
+        self.username = username
+        self.tokens = normalize(title).split()
+        self.rank = rank
+
+    @classmethod
+    def from_entity(cls, entity, rank: float = 0.0) -> Optional["DialogEntry"]:
+        if isinstance(entity, User):
+            kind = "user"
+            title = " ".join(filter(None, [entity.first_name, entity.last_name]))
+        elif isinstance(entity, Chat):
+            kind = "chat"
+            title = entity.title or ""
+        elif isinstance(entity, Channel):
+            kind = "channel"
+            title = entity.title or ""
+        else:
+            return None
+        if getattr(entity, "min", False):
+            return None
+        return cls(
+            utils.get_peer_id(entity), kind, entity.id,
+            getattr(entity, "access_hash", None), title,
+            (getattr(entity, "username", None) or "").lower(), rank
+        )
+
+    def input_peer(self):
+        if self.kind == "user":
+            return InputPeerUser(self.id, self.access_hash or 0)
+        if self.kind == "channel":
+            return InputPeerChannel(self.id, self.access_hash or 0)
+        return InputPeerChat(self.id)
+
+    def to_list(self) -> list:
+        return [self.peer_id, self.kind, self.id, self.access_hash, self.title, self.username, self.rank]
+
+class DialogIndex:
+    def __init__(self, path: str = DIALOGS_FILE):
+        self.path = path
+        self.entries: Dict[int, DialogEntry] = {}
+        self.built_at = 0.0
+        self._by_username: Dict[str, int] = {}
+        self._by_title: Dict[str, Set[int]] = {}
+        self._save_handle = None
+        self._building = None
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning("Не удалось загрузить индекс диалогов: %s", e)
+            return
+
+        self.built_at = data.get("built_at", 0.0)
+        for item in data.get("dialogs", []):
+            try:
+                self._add(DialogEntry(*item))
+            except TypeError:
+                continue
+
+    def _write(self, payload: dict) -> bool:
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            return True
+        except Exception as e:
+            logger.warning("Не удалось сохранить индекс диалогов: %s", e)
+            return False
+
+    def _payload(self) -> dict:
+        return {
+            "built_at": self.built_at,
+            "dialogs": [entry.to_list() for entry in self.entries.values()],
+        }
+
+    def _schedule_save(self):
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._save_handle = loop.call_later(SAVE_DELAY, self._save_later, loop)
+
+    def _save_later(self, loop):
+        self._save_handle = None
+        loop.run_in_executor(None, self._write, self._payload())
+
+    def save(self):
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self._write(self._payload())
+
+    def _add(self, entry: DialogEntry):
+        self._discard(entry.peer_id)
+        self.entries[entry.peer_id] = entry
+        if entry.username:
+            self._by_username[entry.username] = entry.peer_id
+        self._by_title.setdefault(" ".join(entry.tokens), set()).add(entry.peer_id)
+
+    def _discard(self, peer_id: int):
+        entry = self.entries.pop(peer_id, None)
+        if entry is None:
+            return
+        if entry.username and self._by_username.get(entry.username) == peer_id:
+            del self._by_username[entry.username]
+        title_key = " ".join(entry.tokens)
+        owners = self._by_title.get(title_key)
+        if owners:
+            owners.discard(peer_id)
+            if not owners:
+                del self._by_title[title_key]
+
+    def upsert(self, entity, rank: Optional[float] = None) -> Optional[DialogEntry]:
+        existing = self.entries.get(utils.get_peer_id(entity)) if isinstance(entity, (User, Chat, Channel)) else None
+        entry = DialogEntry.from_entity(entity, rank if rank is not None else time.time())
+        if entry is None:
+            return None
+        if existing is not None and rank is None:
+            if (existing.title, existing.username, existing.access_hash) == (entry.title, entry.username, entry.access_hash):
+                existing.rank = entry.rank
+                return existing
+        self._add(entry)
+        self._schedule_save()
+        return entry
+
+    def remove(self, peer_id: int):
+        if peer_id in self.entries:
+            self._discard(peer_id)
+            self._schedule_save()
+
+    async def build(self, client):
+        if self._building is None:
+            self._building = asyncio.ensure_future(self._build(client))
+        try:
+            await asyncio.shield(self._building)
+        finally:
+            self._building = None
+
+    async def _build(self, client):
+        start = time.perf_counter()
+        seen = set()
+        async for dialog in client.iter_dialogs():
+            rank = dialog.date.timestamp() if dialog.date else 0.0
+            entry = DialogEntry.from_entity(dialog.entity, rank)
+            if entry is not None:
+                self._add(entry)
+                seen.add(entry.peer_id)
+        for peer_id in [p for p in self.entries if p not in seen]:
+            self._discard(peer_id)
+        self.built_at = time.time()
+        self._schedule_save()
+        logger.info("Индекс диалогов построен: %d за %.1f с", len(self.entries), time.perf_counter() - start)
+
+    def is_stale(self) -> bool:
+        return not self.entries or time.time() - self.built_at > REBUILD_INTERVAL
+
+    def exact(self, query: str) -> Optional[DialogEntry]:
+        query = query.strip()
+        if query.lstrip("-").isdigit():
+            value = int(query)
+            entry = self.entries.get(value)
+            if entry is not None:
+                return entry
+            for entry in self.entries.values():
+                if entry.id == value:
+                    return entry
+            return None
+
+        peer_id = self._by_username.get(query.lower().lstrip("@"))
+        if peer_id is not None:
+            return self.entries[peer_id]
+
+        owners = self._by_title.get(normalize(query))
+        if owners:
+            return self._best(owners)
+        return None
+
+    def containing(self, query: str) -> Optional[DialogEntry]:
+        needle = query.strip().lower()
+        if not needle:
+            return None
+        found = [
+            entry for entry in self.entries.values()
+            if needle in entry.title.lower() or needle in entry.username or needle in str(entry.id)
+        ]
+        return max(found, key=lambda entry: entry.rank) if found else None
+
+    def _best(self, owners: Set[int]) -> DialogEntry:
+        return max((self.entries[p] for p in owners), key=lambda entry: entry.rank)
+
+    def attach(self, client):
+        async def on_message(event):
+            chat = event.chat
+            if chat is not None:
+                self.upsert(chat)
+
+        async def on_action(event):
+            chat = event.chat
+            if chat is None:
+                return
+            if event.user_kicked or event.user_left:
+                me = await client.get_me(input_peer=True)
+                if me.user_id in (event.user_ids or []):
+                    self.remove(utils.get_peer_id(chat))
+                    return
+            self.upsert(chat)
+
+        client.add_event_handler(on_message, events.NewMessage)
+        client.add_event_handler(on_action, events.ChatAction)
@@ -0,0 +1,233 @@
+import os
+import json
+import html
+import asyncio
+import logging
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from telethon import utils, errors
+
+logger = logging.getLogger("faust_assistant")
+
+BASE_DIR = os.path.dirname(__file__)
+EXPORT_DIR = os.path.join(BASE_DIR, "exports")
+
+MEDIA_WORKERS = int(os.getenv("FAUST_EXPORT_MEDIA_WORKERS", "3"))
+MEDIA_MAX_SIZE = int(os.getenv("FAUST_EXPORT_MEDIA_MAX_MB", "20")) * 1024 * 1024
+FLOOD_RETRIES = 3
+CHECKPOINT_EVERY = 200
+PROGRESS_EVERY = 500
+
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+_locks = {}
+
+class ChatExporter:
+    def __init__(self, client, entity, title: str, with_media: bool = True, with_html: bool = False,
+                 on_progress: Optional[ProgressCallback] = None, limit: Optional[int] = None):
+        self.client = client
+        self.entity = entity
+        self.title = title
+        self.with_media = with_media
+        self.with_html = with_html
+        self.on_progress = on_progress
+        self.limit = limit
+        self.peer_id = utils.get_peer_id(entity)
+        self.dir = os.path.join(EXPORT_DIR, str(self.peer_id))
+        self.media_dir = os.path.join(self.dir, "media")
+        self.log_path = os.path.join(self.dir, "messages.jsonl")
+        self.checkpoint_path = os.path.join(self.dir, "checkpoint.json")
+        self.last_id = 0
+        self.count = 0
+        self.offset = 0
+        self.media_count = 0
+        self.media_errors = 0
+        self._queue: Optional[asyncio.Queue] = None
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.last_id = data.get("last_id", 0)
+            self.count = data.get("count", 0)
+            self.offset = data.get("offset", 0)
+            self.media_count = data.get("media", 0)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def _save_checkpoint(self):
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "last_id": self.last_id,
+                "count": self.count,
+                "offset": self.offset,
+                "media": self.media_count,
+            }, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _media_name(self, message) -> Optional[str]:
+        if not self.with_media or message.media is None:
+            return None
+        if message.file is None or (message.file.size or 0) > MEDIA_MAX_SIZE:
+            return None
+        return f"{message.id}{utils.get_extension(message.media) or '.bin'}"
+
+    async def records(self) -> AsyncIterator[tuple]:
+        async for message in self.client.iter_messages(self.entity, reverse=True, min_id=self.last_id, limit=self.limit):
+            sender = message.sender
+            media_name = self._media_name(message)
+            record = {
+                "id": message.id,
+                "date": message.date.isoformat() if message.date else None,
+                "sender_id": message.sender_id,
+                "sender": utils.get_display_name(sender) if sender else None,
+                "text": message.message or "",
+                "reply_to": message.reply_to_msg_id,
+                "media": f"media/{media_name}" if media_name else (type(message.media).__name__ if message.media else None),
+            }
+            yield message, record, media_name
+
+    async def _download(self, message, path: str):
+        temp_path = path + ".part"
+        try:
+            for attempt in range(FLOOD_RETRIES + 1):
+                try:
+                    await self.client.download_media(message, file=temp_path)
+                    break
+                except errors.FloodWaitError as e:
+                    if attempt == FLOOD_RETRIES:
+                        raise
+                    await asyncio.sleep(e.seconds + 1)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def _start_window(self):
+        if self.last_id or not self.limit:
+            return
+        older = await self.client.get_messages(self.entity, limit=1, add_offset=self.limit)
+        if older:
+            self.last_id = older[0].id
+
+    async def _download_worker(self):
+        while True:
+            message, media_name = await self._queue.get()
+            try:
+                path = os.path.join(self.media_dir, media_name)
+                if not os.path.exists(path):
+                    await self._download(message, path)
+                self.media_count += 1
+            except Exception as e:
+                self.media_errors += 1
+                logger.warning("Экспорт: не удалось скачать медиа %s: %s", message.id, e)
+            finally:
+                self._queue.task_done()
+
+    async def _report(self, text: str):
+        if self.on_progress is not None:
+            try:
+                await self.on_progress(text)
+            except Exception:
+                pass
+
+    async def run(self) -> str:
+        os.makedirs(self.media_dir, exist_ok=True)
+        self._load_checkpoint()
+        await self._start_window()
+        self._queue = asyncio.Queue(maxsize=MEDIA_WORKERS * 4)
+        workers = [asyncio.ensure_future(self._download_worker()) for _ in range(MEDIA_WORKERS)]
+
+        try:
+            with open(self.log_path, "a+b") as log:
+                log.truncate(self.offset)
+                log.seek(self.offset)
+                since_checkpoint = 0
+                async for message, record, media_name in self.records():
+                    log.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                    if media_name:
+                        await self._queue.put((message, media_name))
+                    self.last_id = message.id
+                    self.count += 1
+                    since_checkpoint += 1
+
+                    if since_checkpoint >= CHECKPOINT_EVERY:
+                        await self._queue.join()
+                        log.flush()
+                        self.offset = log.tell()
+                        self._save_checkpoint()
+                        since_checkpoint = 0
+                    if self.count % PROGRESS_EVERY == 0:
+                        await self._report(f"Экспорт '{self.title}': {self.count} сообщений...")
+
+                await self._queue.join()
+                log.flush()
+                self.offset = log.tell()
+                self._save_checkpoint()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if self.with_html:
+            await asyncio.to_thread(self._write_html)
+        await self._report(f"Экспорт '{self.title}': упаковываю {self.count} сообщений...")
+        return await asyncio.to_thread(self._pack)
+
+    def _write_html(self):
+        html_path = os.path.join(self.dir, "messages.html")
+        with open(self.log_path, "r", encoding="utf-8") as src, open(html_path, "w", encoding="utf-8") as out:
+            out.write(
+                "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+                f"<title>{html.escape(self.title)}</title>"
+                "<style>body{font-family:sans-serif;max-width:800px;margin:auto}"
+                ".m{margin:8px 0}.s{font-weight:bold}.d{color:#888;font-size:small}</style>"
+                f"</head><body><h1>{html.escape(self.title)}</h1>\n"
+            )
+            for line in src:
+                record = json.loads(line)
+                media = record.get("media") or ""
+                if media.startswith("media/"):
+                    media = f"<div><a href=\"{html.escape(media)}\">{html.escape(media)}</a></div>"
+                elif media:
+                    media = f"<div class=\"d\">[{html.escape(media)}]</div>"
+                out.write(
+                    f"<div class=\"m\" id=\"m{record['id']}\"><span class=\"s\">{html.escape(record.get('sender') or str(record.get('sender_id')))}</span> "
+                    f"<span class=\"d\">{html.escape(record.get('date') or '')}</span>"
+                    f"<div>{html.escape(record.get('text') or '').replace(chr(10), '<br>')}</div>{media}</div>\n"
+                )
+            out.write("</body></html>\n")
+
+    def _pack(self) -> str:
+        archive_path = os.path.join(EXPORT_DIR, f"{self.peer_id}.zip")
+        temp_path = archive_path + ".tmp"
+        with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for root, _, files in os.walk(self.dir):
+                for name in files:
+                    if name == os.path.basename(self.checkpoint_path):
+                        continue
+                    path = os.path.join(root, name)
+                    archive.write(path, os.path.relpath(path, self.dir))
+        os.replace(temp_path, archive_path)
+        return archive_path
+
+async def export_chat(client, entity, title: str, with_media: bool = True, with_html: bool = False,
+                      on_progress: Optional[ProgressCallback] = None, upload_to="me",
+                      limit: Optional[int] = None) -> ChatExporter:
+    exporter = ChatExporter(client, entity, title, with_media, with_html, on_progress, limit)
+    lock = _locks.setdefault(exporter.peer_id, asyncio.Lock())
+    if lock.locked():
+        raise RuntimeError("экспорт этого чата уже идёт")
+
+    async with lock:
+        archive_path = await exporter.run()
+        if upload_to is not None:
+            await exporter._report(f"Экспорт '{title}': загружаю архив...")
+            await client.send_file(
+                upload_to,
+                archive_path,
+                caption=f"Экспорт чата {title}: {exporter.count} сообщений, {exporter.media_count} файлов",
+                force_document=True,
+            )
+    return exporter
@@ -0,0 +1,163 @@
+import os
+import json
+import re
+import time
+import heapq
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+_CLEAN_RE = re.compile(r'[^\w\s]')
+
+NGRAM_SIZE = 3
+SHORTLIST_SIZE = 32
+MAX_POSTING_RATIO = 0.05
+CHECK_INTERVAL = 2.0
+
+def normalize(text: str) -> str:
+    return _CLEAN_RE.sub('', text.lower().strip())
+
+def _features(text: str) -> Set[str]:
+    padded = f" {text} "
+    if len(padded) <= NGRAM_SIZE:
+        features = {padded}
+    else:
+        features = {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+    features.update(f"#{word}" for word in text.split())
+    return features
+
+@lru_cache(maxsize=4096)
+def similarity(a: str, b: str) -> float:
+    a_clean = normalize(a)
+    b_clean = normalize(b)
+
+    if a_clean == b_clean:
+        return 1.0
+
+    a_words = set(a_clean.split())
+    b_words = set(b_clean.split())
+
+    if not a_words or not b_words:
+        return 0.0
+
+    intersection = len(a_words & b_words)
+    union = len(a_words | b_words)
+
+    jaccard = intersection / union if union > 0 else 0.0
+    sequence = SequenceMatcher(None, a_clean, b_clean).ratio()
+
+    return max(jaccard, sequence)
+
+class FAQIndex:
+    def __init__(self, path: str, shortlist_size: int = SHORTLIST_SIZE, check_interval: float = CHECK_INTERVAL):
+        self.path = path
+        self.shortlist_size = shortlist_size
+        self.check_interval = check_interval
+        self.data: Dict[str, str] = {}
+        self._exact: Dict[str, List[str]] = defaultdict(list)
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._grams: Dict[str, Set[str]] = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self.version = 0
+        self.refresh(force=True)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def _read(self) -> dict:
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+                    if not content:
+                        return {}
+                    data = json.loads(content)
+                    return data if isinstance(data, dict) else {}
+            except FileNotFoundError:
+                return {}
+            except:
+                if attempt == max_retries - 1:
+                    return {}
+                time.sleep(0.1)
+        return {}
+
+    def refresh(self, force: bool = False) -> bool:
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if not force and mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        self.update(self._read())
+        return True
+
+    def update(self, new_data: Dict[str, str]):
+        for question in [q for q in self.data if q not in new_data]:
+            self._remove(question)
+        for question, answer in new_data.items():
+            if question not in self.data:
+                self._add(question)
+            self.data[question] = answer
+        self.version += 1
+
+    def _add(self, question: str):
+        clean = normalize(question)
+        grams = _features(clean)
+        self._exact[clean].append(question)
+        self._grams[question] = grams
+        for gram in grams:
+            self._postings[gram].add(question)
+
+    def _remove(self, question: str):
+        clean = normalize(question)
+        exact = self._exact.get(clean)
+        if exact:
+            exact.remove(question)
+            if not exact:
+                del self._exact[clean]
+        for gram in self._grams.pop(question, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(question)
+                if not posting:
+                    del self._postings[gram]
+        self.data.pop(question, None)
+
+    def exact(self, prompt: str) -> Optional[str]:
+        matches = self._exact.get(normalize(prompt))
+        return matches[0] if matches else None
+
+    def shortlist(self, prompt: str, limit: Optional[int] = None) -> List[str]:
+        limit = limit or self.shortlist_size
+        grams = _features(normalize(prompt))
+        postings = sorted(
+            (self._postings[gram] for gram in grams if gram in self._postings),
+            key=len
+        )
+        if not postings:
+            return []
+
+        max_posting = max(self.shortlist_size, int(len(self.data) * MAX_POSTING_RATIO))
+        counts: Dict[str, int] = defaultdict(int)
+        for posting in postings:
+            if len(posting) > max_posting and counts:
+                break
+            for question in posting:
+                counts[question] += 1
+
+        prompt_size = len(grams)
+        return heapq.nlargest(
+            limit,
+            counts,
+            key=lambda q: 2 * counts[q] / (prompt_size + len(self._grams[q]))
+        )
@@ -5,6 +5,7 @@ import time
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import hashlib
+from collections import OrderedDict, deque
 
 BASE_DIR = os.path.dirname(__file__)
 USERS_DIR = os.path.join(BASE_DIR, "users")
@@ -13,129 +14,211 @@ os.makedirs(USERS_DIR, exist_ok=True)
 def _sanitize_user_id(user_id: str) -> str:
     return re.sub(r'[<>:"/\\|?*]', '_', str(user_id))
 
-def _user_history_file(user_id: str) -> str:
+def _user_dir(user_id: str) -> str:
     uid = _sanitize_user_id(user_id)
     udir = os.path.join(USERS_DIR, uid)
     os.makedirs(udir, exist_ok=True)
-    return os.path.join(udir, "history.json")
+    return udir
+
+def _user_history_file(user_id: str) -> str:
+    return os.path.join(_user_dir(user_id), "history.jsonl")
+
+def _legacy_history_file(user_id: str) -> str:
+    return os.path.join(_user_dir(user_id), "history.json")
 
 def _user_history_backup_file(user_id: str) -> str:
-    uid = _sanitize_user_id(user_id)
-    udir = os.path.join(USERS_DIR, uid)
-    os.makedirs(udir, exist_ok=True)
     timestamp = int(time.time())
-    return os.path.join(udir, f"history_backup_{timestamp}.json")
+    return os.path.join(_user_dir(user_id), f"history_backup_{timestamp}.json")
+
+HISTORY_KEEP = 80
+HISTORY_COMPACT_AT = 100
+MAX_CACHED_USERS = 256
+_TAIL_BLOCK = 8192
+
+class _UserLog:
+    __slots__ = ("entries", "lines_on_disk")
+
+    def __init__(self, entries: List[Dict[str, Any]], lines_on_disk: int):
+        self.entries = deque(entries, maxlen=HISTORY_COMPACT_AT)
+        self.lines_on_disk = lines_on_disk
+
+_logs: "OrderedDict[str, _UserLog]" = OrderedDict()
+
+def _validate_entry(entry: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(entry, dict):
+        return None
+    if "prompt" not in entry and "user" not in entry:
+        return None
+    if "response" not in entry and "assistant" not in entry:
+        return None
+    return {
+        "timestamp": entry.get("timestamp", datetime.utcnow().isoformat()),
+        "prompt": entry.get("user", entry.get("prompt", "")),
+        "response": entry.get("assistant", entry.get("response", "")),
+        "meta": entry.get("meta", {})
+    }
+
+def _tail_lines(path: str, count: int) -> List[bytes]:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buffer = b""
+        while pos > 0 and buffer.count(b"\n") <= count:
+            step = min(_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            buffer = f.read(step) + buffer
+    lines = [line for line in buffer.split(b"\n") if line.strip()]
+    if pos > 0:
+        lines = lines[1:]
+    return lines[-count:]
+
+def _parse_lines(lines: List[bytes]) -> List[Dict[str, Any]]:
+    entries = []
+    for line in lines:
+        try:
+            entry = _validate_entry(json.loads(line))
+        except (ValueError, UnicodeDecodeError):
+            continue
+        if entry:
+            entries.append(entry)
+    return entries
+
+def _write_log(path: str, entries: List[Dict[str, Any]]):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    os.replace(temp_path, path)
+
+def _migrate_legacy(user_id: str, path: str):
+    legacy_path = _legacy_history_file(user_id)
+    if os.path.exists(path) or not os.path.exists(legacy_path):
+        return
+    try:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            content = f.read().strip()
+        history = json.loads(content) if content else []
+    except json.JSONDecodeError:
+        try:
+            os.rename(legacy_path, _user_history_backup_file(user_id))
+        except:
+            pass
+        return
+    except Exception:
+        return
+
+    if not isinstance(history, list):
+        history = []
+    entries = [e for e in (_validate_entry(entry) for entry in history) if e]
+    _write_log(path, entries[-HISTORY_KEEP:])
+    os.remove(legacy_path)
+
+def _compact(user_id: str, log: _UserLog):
+    keep = list(log.entries)[-HISTORY_KEEP:]
+    _write_log(_user_history_file(user_id), keep)
+    log.entries = deque(keep, maxlen=HISTORY_COMPACT_AT)
+    log.lines_on_disk = len(keep)
+
+def _compact_if_needed(user_id: str, log: _UserLog):
+    if log.lines_on_disk <= HISTORY_COMPACT_AT:
+        return
+    try:
+        _compact(user_id, log)
+    except Exception:
+        pass
+
+def _get_log(user_id: str) -> _UserLog:
+    key = _sanitize_user_id(user_id)
+    log = _logs.get(key)
+    if log is not None:
+        _logs.move_to_end(key)
+        return log
 
-def load_history(user_id: str, max_entries: int = 30) -> List[Dict[str, Any]]:
     path = _user_history_file(user_id)
-    if not os.path.exists(path):
+    _migrate_legacy(user_id, path)
+
+    lines = _tail_lines(path, HISTORY_COMPACT_AT + 1) if os.path.exists(path) else []
+    log = _UserLog(_parse_lines(lines), len(lines))
+    _compact_if_needed(user_id, log)
+
+    _logs[key] = log
+    while len(_logs) > MAX_CACHED_USERS:
+        _logs.popitem(last=False)
+    return log
+
+def load_history(user_id: str, max_entries: int = 30) -> List[Dict[str, Any]]:
+    try:
+        entries = _get_log(user_id).entries
+    except Exception:
         return []
-    
-    max_retries = 2
-    for attempt in range(max_retries):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    return []
-                history = json.loads(content)
-            
-            if not isinstance(history, list):
-                return []
-            
-            validated_history = []
-            for entry in history:
-                if isinstance(entry, dict) and 'user' in entry and 'assistant' in entry:
-                    validated_entry = {
-                        "timestamp": entry.get("timestamp", datetime.utcnow().isoformat()),
-                        "prompt": entry.get("user", entry.get("prompt", "")),
-                        "response": entry.get("assistant", entry.get("response", "")),
-                        "meta": entry.get("meta", {})
-                    }
-                    validated_history.append(validated_entry)
-            
-            return validated_history[-max_entries:] if max_entries else validated_history
-            
-        except json.JSONDecodeError as e:
-            if attempt == max_retries - 1:
-                backup_path = _user_history_backup_file(user_id)
-                try:
-                    os.rename(path, backup_path)
-                except:
-                    pass
-                return []
-            time.sleep(0.1)
-        except Exception as e:
-            if attempt == max_retries - 1:
-                return []
-            time.sleep(0.1)
-    
-    return []
+
+    if not max_entries:
+        return list(entries)
+    return list(entries)[-max_entries:]
 
 def add_entry(user_id: str, user_text: str, assistant_text: str, metadata: Optional[Dict] = None) -> bool:
     if not user_text or not assistant_text:
         return False
-    
-    path = _user_history_file(user_id)
+
+    entry = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "prompt": user_text.strip(),
+        "response": assistant_text.strip(),
+        "meta": metadata or {},
+        "hash": hashlib.md5(f"{user_text}{assistant_text}".encode()).hexdigest()[:12]
+    }
+
     max_retries = 3
-    
     for attempt in range(max_retries):
         try:
-            current_history = load_history(user_id, max_entries=0)
-            
-            entry = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "prompt": user_text.strip(),
-                "response": assistant_text.strip(),
-                "meta": metadata or {},
-                "hash": hashlib.md5(f"{user_text}{assistant_text}".encode()).hexdigest()[:12]
-            }
-            
-            current_history.append(entry)
-            
-            if len(current_history) > 100:
-                current_history = current_history[-80:]
-            
-            temp_path = path + ".tmp"
-            with open(temp_path, "w", encoding="utf-8") as f:
-                json.dump(current_history, f, ensure_ascii=False, indent=2, default=str)
-            
-            if os.path.exists(path):
-                os.replace(temp_path, path)
-            else:
-                os.rename(temp_path, path)
-            
-            return True
-            
-        except Exception as e:
+            log = _get_log(user_id)
+            with open(_user_history_file(user_id), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            break
+        except Exception:
+            _logs.pop(_sanitize_user_id(user_id), None)
             if attempt == max_retries - 1:
                 return False
             time.sleep(0.1)
-    
-    return False
+
+    log.entries.append(_validate_entry(entry))
+    log.lines_on_disk += 1
+
+    _compact_if_needed(user_id, log)
+    return True
+
+def _has_history(user_dir: str) -> bool:
+    return any(
+        os.path.exists(os.path.join(user_dir, name))
+        for name in ("history.jsonl", "history.json")
+    )
 
 def clear_history(user_id: Optional[str] = None) -> int:
     cleared_count = 0
     try:
         if user_id is None:
+            _logs.clear()
             for uid in os.listdir(USERS_DIR):
                 user_dir = os.path.join(USERS_DIR, uid)
-                if os.path.isdir(user_dir):
-                    history_path = os.path.join(user_dir, "history.json")
-                    if os.path.exists(history_path):
-                        try:
-                            os.remove(history_path)
-                            cleared_count += 1
-                        except:
-                            pass
+                if os.path.isdir(user_dir) and _has_history(user_dir):
+                    try:
+                        for name in ("history.jsonl", "history.json"):
+                            history_path = os.path.join(user_dir, name)
+                            if os.path.exists(history_path):
+                                os.remove(history_path)
+                        cleared_count += 1
+                    except:
+                        pass
         else:
-            path = _user_history_file(user_id)
-            if os.path.exists(path):
-                os.remove(path)
-                cleared_count = 1
+            _logs.pop(_sanitize_user_id(user_id), None)
+            for path in (_user_history_file(user_id), _legacy_history_file(user_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+                    cleared_count = 1
     except Exception:
         pass
-    
+
     return cleared_count
 
 def get_history_stats(user_id: Optional[str] = None) -> Dict[str, Any]:
@@ -158,8 +241,7 @@ def get_history_stats(user_id: Optional[str] = None) -> Dict[str, Any]:
             for uid in os.listdir(USERS_DIR):
                 user_dir = os.path.join(USERS_DIR, uid)
                 if os.path.isdir(user_dir):
-                    history_path = os.path.join(user_dir, "history.json")
-                    if os.path.exists(history_path):
+                    if _has_history(user_dir):
                         total_users += 1
                         try:
                             hist = load_history(uid, max_entries=0)
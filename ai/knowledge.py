@@ -1,7 +1,10 @@
 import os
+import re
 import json
+import math
+import heapq
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 KNOWLEDGE_DIR = os.path.join(BASE_DIR, "knowledge")
@@ -9,23 +12,123 @@ KNOWLEDGE_FILE = os.path.join(KNOWLEDGE_DIR, "knowledge_base.json")
 
 logger = logging.getLogger("faust_assistant")
 
+TOP_K = int(os.getenv("FAUST_KNOWLEDGE_TOP_K", "8"))
+STEM_LENGTH = 6
+BM25_K1 = 1.5
+BM25_B = 0.75
+
 os.makedirs(KNOWLEDGE_DIR, exist_ok=True)
 
+_TERM_RE = re.compile(r"\w+")
+
+_cache = {"version": None, "data": {}, "text": None}
+
+def _terms(text: str) -> List[str]:
+    return [word[:STEM_LENGTH] for word in _TERM_RE.findall(text.lower().replace("ё", "е"))]
+
+class KnowledgeIndex:
+    def __init__(self):
+        self.version = None
+        self.docs: Dict[int, Tuple[str, str, int]] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, category: str, item: str):
+        if (category, item) in self._ids:
+            return
+        doc_id = self._next_id
+        self._next_id += 1
+        terms = _terms(f"{category} {item}")
+        self.docs[doc_id] = (category, item, len(terms))
+        self._ids[(category, item)] = doc_id
+        self.total_length += len(terms)
+        for term in terms:
+            postings = self.postings.setdefault(term, {})
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+
+    def remove(self, category: str, item: str):
+        doc_id = self._ids.pop((category, item), None)
+        if doc_id is None:
+            return
+        _, _, length = self.docs.pop(doc_id)
+        self.total_length -= length
+        for term in set(_terms(f"{category} {item}")):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def rebuild(self, knowledge: Dict[str, List[str]], version):
+        self.__init__()
+        for category, items in knowledge.items():
+            for item in items:
+                self.add(category, item)
+        self.version = version
+
+    def search(self, query: str, k: int = TOP_K) -> List[Tuple[str, str, float]]:
+        if not self.docs:
+            return []
+        count = len(self.docs)
+        avg_length = self.total_length / count or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(_terms(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self.docs[doc_id][2]
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        best = heapq.nlargest(k, scores.items(), key=lambda pair: pair[1])
+        return [(self.docs[doc_id][0], self.docs[doc_id][1], score) for doc_id, score in best]
+
+_index = KnowledgeIndex()
+
+def knowledge_version() -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(KNOWLEDGE_FILE)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 def _load_knowledge_base() -> Dict[str, List[str]]:
-    if os.path.exists(KNOWLEDGE_FILE):
+    version = knowledge_version()
+    if version == _cache["version"]:
+        return _cache["data"]
+
+    data = {}
+    if version is not None:
         try:
             with open(KNOWLEDGE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+                data = json.load(f)
         except Exception as e:
             logger.error("Ошибка загрузки базы знаний: %s", e)
-    return {}
+    _cache.update(version=version, data=data, text=None)
+    return data
 
-def _save_knowledge_base(knowledge: Dict[str, List[str]]):
+def _save_knowledge_base(knowledge: Dict[str, List[str]]) -> bool:
     try:
         with open(KNOWLEDGE_FILE, "w", encoding="utf-8") as f:
             json.dump(knowledge, f, ensure_ascii=False, indent=2)
+        _cache.update(version=knowledge_version(), data=knowledge, text=None)
+        return True
     except Exception as e:
+        _cache["version"] = None
         logger.error("Ошибка сохранения базы знаний: %s", e)
+        return False
+
+def _get_index() -> KnowledgeIndex:
+    knowledge = _load_knowledge_base()
+    if _index.version != _cache["version"]:
+        _index.rebuild(knowledge, _cache["version"])
+    return _index
 
 def add_knowledge(category: str, information: str) -> bool:
     try:
@@ -34,8 +137,11 @@ def add_knowledge(category: str, information: str) -> bool:
             knowledge[category] = []
         
         if information not in knowledge[category]:
+            synced = _index.version == _cache["version"]
             knowledge[category].append(information)
-            _save_knowledge_base(knowledge)
+            if _save_knowledge_base(knowledge) and synced:
+                _index.add(category, information)
+                _index.version = _cache["version"]
             logger.info("Добавлена информация в категорию '%s': %s", category, information[:50])
             return True
         return False
@@ -47,10 +153,13 @@ def remove_knowledge(category: str, information: str) -> bool:
     try:
         knowledge = _load_knowledge_base()
         if category in knowledge and information in knowledge[category]:
+            synced = _index.version == _cache["version"]
             knowledge[category].remove(information)
             if not knowledge[category]:
                 del knowledge[category]
-            _save_knowledge_base(knowledge)
+            if _save_knowledge_base(knowledge) and synced:
+                _index.remove(category, information)
+                _index.version = _cache["version"]
             logger.info("Удалена информация из категории '%s': %s", category, information[:50])
             return True
         return False
@@ -60,10 +169,10 @@ def remove_knowledge(category: str, information: str) -> bool:
 
 def get_knowledge_by_category(category: str) -> List[str]:
     knowledge = _load_knowledge_base()
-    return knowledge.get(category, [])
+    return list(knowledge.get(category, []))
 
 def get_all_knowledge() -> Dict[str, List[str]]:
-    return _load_knowledge_base()
+    return {category: list(items) for category, items in _load_knowledge_base().items()}
 
 def search_knowledge(query: str) -> List[str]:
     knowledge = _load_knowledge_base()
@@ -81,8 +190,8 @@ def search_knowledge(query: str) -> List[str]:
 
 def knowledge_to_text() -> str:
     knowledge = _load_knowledge_base()
-    if not knowledge:
-        return ""
+    if _cache["text"] is not None:
+        return _cache["text"]
     
     sections = []
     for category, items in knowledge.items():
@@ -90,4 +199,20 @@ def knowledge_to_text() -> str:
             section = f"{category}:\n" + "\n".join(f"- {item}" for item in items)
             sections.append(section)
     
-    return "\n\n".join(sections)
\ No newline at end of file
+    _cache["text"] = "\n\n".join(sections)
+    return _cache["text"]
+
+def retrieve_knowledge(query: str, k: int = TOP_K) -> List[Tuple[str, str, float]]:
+    return _get_index().search(query, k)
+
+def relevant_knowledge_text(query: str, k: int = TOP_K, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    grouped: Dict[str, List[str]] = {}
+    hits = list(extra) + [(category, item) for category, item, _ in retrieve_knowledge(query, k)]
+    for category, item in hits:
+        items = grouped.setdefault(category, [])
+        if item not in items:
+            items.append(item)
+    return "\n\n".join(
+        f"{category}:\n" + "\n".join(f"- {item}" for item in items)
+        for category, items in grouped.items()
+    )
\ No newline at end of file
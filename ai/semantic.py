@@ -0,0 +1,182 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from itertools import islice
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger("faust_assistant")
+
+BASE_DIR = os.path.dirname(__file__)
+VECTORS_DIR = os.path.join(BASE_DIR, "vectors")
+
+ENABLED = os.getenv("FAUST_SEMANTIC", "0") == "1" and np is not None
+EMBED_BATCH = 32
+INITIAL_CAPACITY = 1024
+
+Embedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+class VectorIndex:
+    def __init__(self, name: str, model: str, directory: str = VECTORS_DIR):
+        self.name = name
+        self.model = model
+        self.matrix_path = os.path.join(directory, f"{name}.f32")
+        self.meta_path = os.path.join(directory, f"{name}.json")
+        self.version = None
+        self.pending: "OrderedDict[str, str]" = OrderedDict()
+        self._task = None
+        self._reset()
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _reset(self):
+        self.dim = 0
+        self.capacity = 0
+        self.size = 0
+        self.rows: Dict[str, int] = {}
+        self.digests: Dict[str, str] = {}
+        self.free: List[int] = []
+        self._keys: List[Optional[str]] = []
+        self._matrix = None
+
+    def load(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning("Не удалось загрузить векторы %s: %s", self.name, e)
+            return
+
+        if meta.get("model") != self.model or not meta.get("dim") or not os.path.exists(self.matrix_path):
+            return
+        self.dim = meta["dim"]
+        self.capacity = meta["capacity"]
+        self.size = meta["size"]
+        self.rows = meta["rows"]
+        self.digests = meta["digests"]
+        self.free = meta["free"]
+        self._keys = [None] * self.size
+        for key, row in self.rows.items():
+            self._keys[row] = key
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def save(self):
+        if self._matrix is None:
+            return
+        self._matrix.flush()
+        temp_path = self.meta_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model,
+                "dim": self.dim,
+                "capacity": self.capacity,
+                "size": self.size,
+                "rows": self.rows,
+                "digests": self.digests,
+                "free": self.free,
+            }, f, ensure_ascii=False)
+        os.replace(temp_path, self.meta_path)
+
+    def _ensure_capacity(self, rows: int, dim: int):
+        if self._matrix is None:
+            os.makedirs(os.path.dirname(self.matrix_path), exist_ok=True)
+            self.dim = dim
+            self.capacity = max(INITIAL_CAPACITY, rows)
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="w+", shape=(self.capacity, self.dim))
+        elif rows > self.capacity:
+            self._matrix.flush()
+            self._matrix = None
+            self.capacity = max(self.capacity * 2, rows)
+            with open(self.matrix_path, "r+b") as f:
+                f.truncate(self.capacity * self.dim * 4)
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def sync(self, items: Dict[str, str], version=None):
+        if version is not None and version == self.version:
+            return
+        for key in [k for k in self.rows if k not in items]:
+            self._discard(key)
+        for key in [k for k in self.pending if k not in items]:
+            del self.pending[key]
+        for key, text in items.items():
+            if self.digests.get(key) != _digest(text):
+                self.pending[key] = text
+        self.version = version
+
+    def _discard(self, key: str):
+        row = self.rows.pop(key)
+        self.digests.pop(key, None)
+        self._matrix[row] = 0
+        self._keys[row] = None
+        self.free.append(row)
+
+    def _store(self, key: str, text: str, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if not norm or (self.dim and len(vector) != self.dim):
+            return
+
+        row = self.rows.get(key)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = self.size
+                self.size += 1
+                self._keys.append(None)
+            self._ensure_capacity(self.size, len(vector))
+        self._matrix[row] = vector / norm
+        self._keys[row] = key
+        self.rows[key] = row
+        self.digests[key] = _digest(text)
+
+    async def drain(self, embed: Embedder, batch: int = EMBED_BATCH):
+        while self.pending:
+            keys = list(islice(self.pending, batch))
+            texts = [self.pending[key] for key in keys]
+            vectors = await embed(texts)
+            if not vectors:
+                break
+            for key, text, vector in zip(keys, texts, vectors):
+                if self.pending.get(key) == text:
+                    del self.pending[key]
+                    self._store(key, text, vector)
+        await asyncio.to_thread(self.save)
+
+    async def _drain_quietly(self, embed: Embedder):
+        try:
+            await self.drain(embed)
+        except Exception as e:
+            logger.warning("Не удалось обновить векторы %s: %s", self.name, e)
+
+    def schedule(self, embed: Embedder):
+        if self.pending and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._drain_quietly(embed))
+
+    def search(self, vector, k: int = 5) -> List[Tuple[str, float]]:
+        if self._matrix is None or not self.rows:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if not norm or len(query) != self.dim:
+            return []
+
+        scores = self._matrix[:self.size] @ (query / norm)
+        count = min(k + len(self.free), self.size)
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [(self._keys[row], float(scores[row])) for row in top if self._keys[row] is not None][:k]
@@ -1,6 +1,8 @@
 import os
 import json
 import re
+import atexit
+import asyncio
 from ai import knowledge
 
 BASE_DIR = os.path.dirname(__file__)
@@ -13,40 +15,120 @@ DEFAULT_STATE = {
     "account_user_id": None
 }
 
-def _load_state() -> dict:
-    if os.path.exists(STATE_FILE):
+FLUSH_DELAY = 0.5
+
+class _StateStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.data = None
+        self.mtime = None
+        self.dirty = False
+        self.writing = 0
+        self._flush_handle = None
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self) -> dict:
+        if (self.dirty or self.writing) and self.data is not None:
+            return self.data
+
+        mtime = self._file_mtime()
+        if self.data is None or mtime != self.mtime:
+            self.data = self._read()
+            self.mtime = mtime
+        return self.data
+
+    def _read(self) -> dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return {**DEFAULT_STATE, **data}
+            except Exception:
+                pass
+        return DEFAULT_STATE.copy()
+
+    def update(self, **changes):
+        state = self.get()
+        state.update(changes)
+        self.replace(state)
+
+    def replace(self, state: dict):
+        self.data = state
+        self.dirty = True
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(FLUSH_DELAY, self._flush_later, loop)
+
+    def _flush_later(self, loop):
+        self._flush_handle = None
+        if not self.dirty:
+            return
+        snapshot = dict(self.data)
+        self.dirty = False
+        self.writing += 1
+        future = loop.run_in_executor(None, self._write, snapshot)
+        future.add_done_callback(self._after_write)
+
+    def _after_write(self, future):
+        self.writing -= 1
+        if not future.cancelled() and future.result():
+            self.mtime = self._file_mtime()
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self.dirty:
+            return
+        self.dirty = False
+        if self._write(dict(self.data)):
+            self.mtime = self._file_mtime()
+
+    def _write(self, state: dict) -> bool:
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return {**DEFAULT_STATE, **data}
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+            return True
         except Exception:
-            pass
-    
-    state = DEFAULT_STATE.copy()
-    _save_state(state)
-    return state
+            return False
+
+_store = _StateStore(STATE_FILE)
+atexit.register(_store.flush)
+
+def _load_state() -> dict:
+    return _store.get()
 
 def _save_state(state: dict):
-    try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    _store.replace(state)
+
+def flush_state():
+    _store.flush()
 
 def set_account_user_id(user_id: int):
-    state = _load_state()
-    state["account_user_id"] = int(user_id)
-    _save_state(state)
+    _store.update(account_user_id=int(user_id))
 
 def get_owner_id() -> int | None:
     state = _load_state()
     return state.get("account_user_id")
 
 def set_owner_id(owner_id: int):
-    state = _load_state()
-    state["account_user_id"] = int(owner_id)
-    _save_state(state)
+    _store.update(account_user_id=int(owner_id))
 
 def get_owner_name() -> str:
     return _load_state().get("owner_name", "")
@@ -55,14 +137,10 @@ def is_auto_reply() -> bool:
     return _load_state().get("auto_reply", True)
 
 def set_owner_name(name: str):
-    state = _load_state()
-    state["owner_name"] = name
-    _save_state(state)
+    _store.update(owner_name=name)
 
 def set_auto_reply(flag: bool):
-    state = _load_state()
-    state["auto_reply"] = bool(flag)
-    _save_state(state)
+    _store.update(auto_reply=bool(flag))
 
 def is_owner(user_id: int | str) -> bool:
     account_user_id = _load_state().get("account_user_id")
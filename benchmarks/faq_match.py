@@ -0,0 +1,111 @@
+import os
+import re
+import json
+import sys
+import time
+import random
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ai import faq_index
+
+SIZES = (1_000, 10_000, 100_000)
+PROMPTS = 20
+LINEAR_BUDGET = 5.0
+
+SYLLABLES = [c + v for c in "бвгдзклмнпрстфхцчш" for v in "аеиоуыя"]
+QUESTION_WORDS = ["как", "что", "где", "почему", "когда", "кто", "сколько", "можно ли"]
+
+_raw_similarity = faq_index.similarity.__wrapped__
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+def build_corpus(size: int, rng: random.Random) -> dict:
+    vocabulary = [_word(rng) for _ in range(max(500, size // 5))]
+    corpus = {}
+    while len(corpus) < size:
+        words = [rng.choice(QUESTION_WORDS)] + rng.sample(vocabulary, rng.randint(2, 5))
+        corpus[" ".join(words)] = f"ответ {len(corpus)}"
+    return corpus
+
+def perturb(question: str, rng: random.Random) -> str:
+    words = question.split()
+    if len(words) > 2 and rng.random() < 0.5:
+        words.pop(rng.randrange(1, len(words)))
+    if rng.random() < 0.5:
+        i = rng.randrange(len(words))
+        words[i] = words[i][:-1] or words[i]
+    return " ".join(words) + rng.choice(["?", "", "!"])
+
+def linear_match(prompt: str, corpus: dict):
+    prompt_clean = re.sub(r'[^\w\s]', '', prompt.lower().strip())
+    for q in corpus:
+        if re.sub(r'[^\w\s]', '', q.lower().strip()) == prompt_clean:
+            return q, 1.0
+
+    best_match, best_score = None, 0.0
+    for question in corpus:
+        score = _raw_similarity(prompt, question)
+        if score > best_score:
+            best_match, best_score = question, score
+    return best_match, best_score
+
+def indexed_match(prompt: str, index: faq_index.FAQIndex):
+    exact = index.exact(prompt)
+    if exact:
+        return exact, 1.0
+
+    best_match, best_score = None, 0.0
+    for question in index.shortlist(prompt):
+        score = _raw_similarity(prompt, question)
+        if score > best_score:
+            best_match, best_score = question, score
+    return best_match, best_score
+
+def run(size: int):
+    rng = random.Random(size)
+    corpus = build_corpus(size, rng)
+    prompts = [perturb(q, rng) for q in rng.sample(list(corpus), PROMPTS)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "faq.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(corpus, f, ensure_ascii=False)
+
+        start = time.perf_counter()
+        index = faq_index.FAQIndex(path)
+        build_ms = (time.perf_counter() - start) * 1000
+
+    indexed = []
+    start = time.perf_counter()
+    for prompt in prompts:
+        indexed.append(indexed_match(prompt, index))
+    indexed_ms = (time.perf_counter() - start) * 1000 / len(prompts)
+
+    linear = []
+    start = time.perf_counter()
+    for prompt in prompts:
+        linear.append(linear_match(prompt, corpus))
+        if time.perf_counter() - start > LINEAR_BUDGET:
+            break
+    linear_ms = (time.perf_counter() - start) * 1000 / len(linear)
+
+    agree = sum(
+        1 for (lq, ls), (iq, iscore) in zip(linear, indexed)
+        if lq == iq or abs(ls - iscore) < 1e-9
+    )
+
+    print(
+        f"{size:>7} вопросов | индекс: сборка {build_ms:8.1f} мс, "
+        f"{indexed_ms:7.2f} мс/запрос | линейный: {linear_ms:9.2f} мс/запрос "
+        f"({len(linear)} запр.) | совпадение топ-1: {agree}/{len(linear)}"
+    )
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    for size in sizes:
+        run(size)
@@ -0,0 +1,130 @@
+import os
+import re
+import sys
+import time
+import random
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ai import commands
+
+ROUNDS = 200
+
+LEGACY_BRANCHES = [
+    ("delete_dialog",
+     [r"(удали|стереть|убрать)\s+(диалог|чат|беседу)?\s*(?:с|из|у)?\s*(.+)", r"(delete|remove)\s+(chat|dialog)?\s*(.+)"],
+     r"(удали|стереть|убрать|delete|remove)\s+(диалог|чат|беседу|chat|dialog)?\s*(?:с|из|у)?\s*(.+)"),
+    ("clear_messages",
+     [r"(очисти|почисти|удали|стереть)\s*(все|мои)?\s*(сообщения|месседжи)?\s*(?:в|из|от)?\s*(.+)", r"(clear|clean)\s*(my|all)?\s*(messages)?\s*(.+)"],
+     r"(очисти|почисти|удали|стереть|clear|clean)\s*(все|мои|my|all)?\s*(сообщения|месседжи|messages)?\s*(?:в|из|от)?\s*(.+)"),
+    ("leave_chat", [r"(отпишись|покинуть|выйти|leave|unsubscribe)\s*(?:из|от|from)?\s*(канала|чата|группы|channel|chat|group)?\s*(.+)"], True),
+    ("join_chat", [r"(подпишись|вступи|присоединись|join|subscribe)\s*(?:в|на|to)?\s*(канал|чат|группу|channel|chat|group)?\s*(.+)"], True),
+    ("archive_chat", [r"(архив|архивируй|разархив|разархивируй)\s*(чат)?\s*(.+)"], True),
+    ("pin_message", [r"(закрепи|прикрепи|открепи|сними)\s*(сообщение)?\s*(?:в|from)?\s*(.+)"], True),
+    ("search_messages", [r"(найди|поищи|find|search)\s*(сообщения|messages)?\s*(?:с|with)?\s*(.+)"], True),
+    ("set_bio", [r"(статус|bio|status)\s*(установи|сделай|set)?\s*(.+)"], True),
+    ("set_name", [r"(имя|name)\s*(установи|смени|set|change)\s*(.+)"], True),
+    ("set_username", [r"(юзернейм|username)\s*(установи|смени|set)\s*(@?\w+)"], r"(юзернейм|username)\s*(установи|смени|set)\s*(@?)(\w+)"),
+    ("entity_info", [r"(инфо|информация|info)\s*(о|about|про)?\s*(.+)"], True),
+    ("my_info", [r"(мо[яё]|my)\s*(инфо|информация|аккаунт|info|account)"], None),
+    ("list_dialogs", [r"(список|лист|диалоги|dialogs|chats)\s*(групп|каналов|всех)?"], True),
+    ("block_user", [r"(заблокируй|блок|block)\s*(пользователя|user)?\s*(.+)"], True),
+    ("unblock_user", [r"(разблокируй|разблок|unblock)\s*(пользователя|user|человека|чела)?\s*(.+)"], True),
+    ("read_all", [r"(прочитай|отметь)\s*(все|всё|all)\s*(как\s*)?прочитанн?ы?е?"], None),
+    ("create_group", [r"(создай|create)\s*(группу|chat)\s*(.+?)"], r"(создай|create)\s*(группу|chat)\s*(.+)"),
+    ("export_history", [r"(экспорт|выгрузи|export)\s*(историю|чат|history)?\s*(.+)"], True),
+    ("user_status", [r"(онлайн|статус|online)\s*(пользователя|user)?\s*(.+)"], True),
+    ("help", [r"(помощь|help|команды|commands)"], None),
+]
+
+PROMPTS = [
+    "привет, как дела?",
+    "расскажи анекдот про программистов",
+    "что ты думаешь о погоде сегодня",
+    "сколько будет два плюс два",
+    "напиши стих про осень",
+    "почему небо голубое",
+    "какой сейчас год",
+    "кто ты такой вообще",
+    "посоветуй фильм на вечер",
+    "переведи на английский: доброе утро",
+    "объясни, что такое рекурсия, простыми словами",
+    "ты меня понимаешь?",
+    "how are you doing today",
+    "tell me something interesting about space",
+    "что приготовить на ужин из курицы и риса",
+    "мне скучно, поговори со мной",
+    "удали чат с @spam_bot",
+    "очисти мои сообщения в рабочем чате",
+    "отпишись от канала новости",
+    "подпишись на @durov",
+    "архивируй чат флуд",
+    "закрепи сообщение в заметки",
+    "найди сообщения с паролем",
+    "статус установи работаю",
+    "имя смени Иван Петров",
+    "юзернейм установи @new_name",
+    "инфо о @telegram",
+    "моя информация",
+    "список групп",
+    "заблокируй пользователя @bad",
+    "разблокируй @friend",
+    "прочитай все как прочитанные",
+    "создай группу тестовая",
+    "экспорт историю семья",
+    "онлайн пользователя @mom",
+    "помощь",
+]
+
+def legacy_match(text: str):
+    for name, triggers, extract in LEGACY_BRANCHES:
+        if any(re.search(pattern, text) for pattern in triggers):
+            if extract is True:
+                return name, re.search(triggers[0], text)
+            if extract:
+                return name, re.search(extract, text)
+            return name, None
+    return None, None
+
+def table_match(text: str):
+    intent, match = commands.INTENTS.match(text)
+    return (intent.name if intent else None), match
+
+def measure(matcher, prompts) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for prompt in prompts:
+            matcher(prompt)
+    return (time.perf_counter() - start) * 1e6 / (ROUNDS * len(prompts))
+
+def run():
+    prompts = [p.strip().lower() for p in PROMPTS]
+    mismatches = []
+    for prompt in prompts:
+        legacy_name, legacy = legacy_match(prompt)
+        name, match = table_match(prompt)
+        legacy_groups = legacy.groups() if legacy else None
+        groups = match.groups() if match and legacy else None
+        if legacy_name != name or legacy_groups != groups:
+            mismatches.append((prompt, legacy_name, name))
+
+    rng = random.Random(0)
+    rng.shuffle(prompts)
+    chat = [p for p in prompts if legacy_match(p)[0] is None]
+
+    for label, sample in (("все запросы", prompts), ("без команд", chat)):
+        legacy_us = measure(legacy_match, sample)
+        table_us = measure(table_match, sample)
+        print(
+            f"{label:>12} ({len(sample):>2}) | последовательно: {legacy_us:7.2f} мкс/запрос | "
+            f"таблица интентов: {table_us:6.2f} мкс/запрос | x{legacy_us / table_us:4.1f}"
+        )
+
+    print(f"Расхождений с последовательным разбором: {len(mismatches)}")
+    for prompt, legacy_name, name in mismatches:
+        print(f"  {prompt!r}: {legacy_name} -> {name}")
+
+if __name__ == "__main__":
+    run()
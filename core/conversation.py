@@ -0,0 +1,92 @@
+import time
+import asyncio
+from telethon import events, utils
+
+DEFAULT_TIMEOUT = 60
+
+_locks = {}
+
+def _bot_lock(bot) -> asyncio.Lock:
+    key = str(bot).lower().lstrip("@")
+    if key not in _locks:
+        _locks[key] = asyncio.Lock()
+    return _locks[key]
+
+class BotConversation:
+    def __init__(self, client, bot, timeout: float = DEFAULT_TIMEOUT, cleanup: bool = True):
+        self.client = client
+        self.bot = bot
+        self.timeout = timeout
+        self.cleanup = cleanup
+        self.message_ids = []
+        self._lock = _bot_lock(bot)
+        self._queue = asyncio.Queue()
+        self._peer = None
+        self._last_sent = 0
+        self._last_consumed = 0
+        self._handlers = []
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+        try:
+            self._peer = await self.client.get_input_entity(self.bot)
+            peer_id = utils.get_peer_id(self._peer)
+            for handler, builder in ((self._on_message, events.NewMessage), (self._on_edit, events.MessageEdited)):
+                event = builder(chats=peer_id, incoming=True)
+                self.client.add_event_handler(handler, event)
+                self._handlers.append((handler, event))
+        except BaseException:
+            self._lock.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            for handler, event in self._handlers:
+                self.client.remove_event_handler(handler, event)
+            if self.cleanup and self.message_ids:
+                try:
+                    await self.client.delete_messages(self._peer, self.message_ids)
+                except Exception:
+                    pass
+        finally:
+            self._lock.release()
+
+    async def _on_message(self, event):
+        self._queue.put_nowait((event.message, False))
+
+    async def _on_edit(self, event):
+        self._queue.put_nowait((event.message, True))
+
+    def _track(self, message):
+        if message.id not in self.message_ids:
+            self.message_ids.append(message.id)
+
+    async def send(self, text, **kwargs):
+        message = await self.client.send_message(self._peer, text, **kwargs)
+        self._last_sent = message.id
+        self._track(message)
+        return message
+
+    async def click(self, message, *args, **kwargs):
+        return await message.click(*args, **kwargs)
+
+    async def wait_for(self, predicate=None, timeout: float = None, strict: bool = False):
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            message, edited = await asyncio.wait_for(self._queue.get(), remaining)
+            floor = max(self._last_sent, self._last_consumed)
+            if message.id < floor or (message.id == floor and not edited):
+                continue
+            self._track(message)
+            if predicate is None or predicate(message):
+                self._last_consumed = message.id
+                return message
+            if strict and not edited:
+                return None
+
+    async def get_response(self, timeout: float = None):
+        return await self.wait_for(timeout=timeout)
@@ -0,0 +1,151 @@
+import os
+import json
+import atexit
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DB_PATH = os.getenv("FAUST_DB_PATH", os.path.join(ROOT, "sessions", "modules.db"))
+COMMIT_DELAY = float(os.getenv("FAUST_DB_COMMIT_DELAY", "1.0"))
+
+_DELETED = object()
+
+class ModuleDB:
+    def __init__(self, path: str, commit_delay: float = COMMIT_DELAY):
+        self.path = path
+        self.commit_delay = commit_delay
+        self._conn = None
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._pending = {}
+        self._flush_handle = None
+        self._executor = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "module TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (module, key)) WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _namespace(self, module: str) -> dict:
+        namespace = self._cache.get(module)
+        if namespace is not None:
+            return namespace
+
+        namespace = {}
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT key, value FROM kv WHERE module = ?", (module,)
+                ).fetchall()
+            for key, value in rows:
+                try:
+                    namespace[key] = json.loads(value)
+                except ValueError:
+                    continue
+        except sqlite3.Error as e:
+            print(f"[FAUST] Ошибка чтения базы модулей ({module}): {e}")
+        self._cache[module] = namespace
+        return namespace
+
+    def get(self, module, key, default=None):
+        return self._namespace(str(module)).get(str(key), default)
+
+    def set(self, module, key, value):
+        module, key = str(module), str(key)
+        self._namespace(module)[key] = value
+        self._pending[(module, key)] = value
+        self._schedule_flush()
+        return True
+
+    def pop(self, module, key, default=None):
+        module, key = str(module), str(key)
+        namespace = self._namespace(module)
+        if key not in namespace:
+            return default
+        value = namespace.pop(key)
+        self._pending[(module, key)] = _DELETED
+        self._schedule_flush()
+        return value
+
+    def keys(self, module):
+        return list(self._namespace(str(module)))
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.commit_delay, self._flush_later, loop)
+
+    def _take_pending(self):
+        upserts, deletes = [], []
+        for (module, key), value in self._pending.items():
+            if value is _DELETED:
+                deletes.append((module, key))
+                continue
+            try:
+                upserts.append((module, key, json.dumps(value, ensure_ascii=False)))
+            except (TypeError, ValueError) as e:
+                print(f"[FAUST] Значение {module}.{key} не сохранено в базу: {e}")
+        self._pending = {}
+        return upserts, deletes
+
+    def _flush_later(self, loop):
+        self._flush_handle = None
+        if not self._pending:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faust-db")
+        loop.run_in_executor(self._executor, self._write, *self._take_pending())
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._pending:
+            self._write(*self._take_pending())
+
+    def _write(self, upserts, deletes) -> bool:
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    if upserts:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO kv (module, key, value) VALUES (?, ?, ?)",
+                            upserts
+                        )
+                    if deletes:
+                        conn.executemany("DELETE FROM kv WHERE module = ? AND key = ?", deletes)
+            return True
+        except sqlite3.Error as e:
+            print(f"[FAUST] Ошибка записи базы модулей: {e}")
+            return False
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+DB = ModuleDB(DB_PATH)
+atexit.register(DB.close)
@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+import aiohttp
+
+HTTP_TIMEOUT = float(os.getenv("FAUST_HTTP_TIMEOUT", "30"))
+HTTP_LIMIT = int(os.getenv("FAUST_HTTP_LIMIT", "64"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("FAUST_HTTP_LIMIT_PER_HOST", "8"))
+HTTP_RETRIES = int(os.getenv("FAUST_HTTP_RETRIES", "3"))
+HTTP_BACKOFF = 0.5
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+PROGRESS_INTERVAL = 0.5
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_session = None
+
+def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_LIMIT,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+    return _session
+
+async def close():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def _retry_delay(attempt: int, response=None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return HTTP_BACKOFF * (2 ** attempt)
+
+async def request(method: str, url: str, consume, retries: int = HTTP_RETRIES, timeout: float = None, retry_unsafe: bool = False, **kwargs):
+    if timeout is not None:
+        kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+    if method.upper() not in IDEMPOTENT_METHODS and not retry_unsafe:
+        retries = 0
+
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        try:
+            async with get_session().request(method, url, **kwargs) as response:
+                if response.status in RETRY_STATUSES and not last:
+                    delay = _retry_delay(attempt, response)
+                else:
+                    response.raise_for_status()
+                    return await consume(response)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last:
+                raise
+            delay = _retry_delay(attempt)
+        await asyncio.sleep(delay)
+
+async def fetch(url: str, method: str = "GET", **kwargs) -> bytes:
+    async def consume(response):
+        return await response.read()
+    return await request(method, url, consume, **kwargs)
+
+async def fetch_text(url: str, method: str = "GET", **kwargs) -> str:
+    async def consume(response):
+        return await response.text()
+    return await request(method, url, consume, **kwargs)
+
+async def fetch_json(url: str, method: str = "GET", **kwargs):
+    async def consume(response):
+        return await response.json(content_type=None)
+    return await request(method, url, consume, **kwargs)
+
+async def download(url: str, path: str, check=None, progress=None, max_size: int = None, **kwargs) -> int:
+    temp_path = path + ".part"
+
+    async def consume(response):
+        if check is not None:
+            check(response)
+        total = response.content_length
+        if max_size and total and total > max_size:
+            raise ValueError(f"Файл слишком большой: {total} байт")
+
+        size = 0
+        reported = -1
+        last_report = time.monotonic()
+        with open(temp_path, "wb") as f:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise ValueError(f"Файл слишком большой: больше {max_size} байт")
+                f.write(chunk)
+                if progress is not None and time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    reported = size
+                    await progress(size, total)
+        if progress is not None and reported != size:
+            await progress(size, total)
+        return size
+
+    try:
+        size = await request("GET", url, consume, **kwargs)
+        os.replace(temp_path, path)
+        return size
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
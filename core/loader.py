@@ -1,14 +1,177 @@
 import os
+import re
 import sys
+import time
+import types
+import asyncio
 import importlib
 import importlib.util
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from telethon import events
 from telethon.tl.custom.message import Message
 from telethon.extensions import html as html_parser
+from .db import DB
+from .manifest import ManifestCache
 
 REGISTERED_COMMANDS = {}
 
+_PREFIX_CHAR = re.compile(r"\w")
+_QUANTIFIERS = "?*{"
+
+def _literal_prefix(pattern: str):
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            if ch == "]":
+                in_class = False
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return None
+        i += 1
+
+    body = pattern[1:] if pattern.startswith("^") else pattern
+    if not body.startswith("\\."):
+        return None
+
+    prefix = []
+    body = body[2:]
+    for i, ch in enumerate(body):
+        if not _PREFIX_CHAR.match(ch):
+            break
+        if i + 1 < len(body) and body[i + 1] in _QUANTIFIERS:
+            break
+        prefix.append(ch)
+    return "".join(prefix)
+
+class CommandRoute:
+    __slots__ = ("pattern", "regex", "prefix", "handler", "seq", "hits", "match_ns")
+
+    def __init__(self, pattern: str, handler, seq: int):
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.prefix = _literal_prefix(pattern)
+        self.handler = handler
+        self.seq = seq
+        self.hits = 0
+        self.match_ns = 0
+
+class CommandRouter:
+    def __init__(self):
+        self.routes = []
+        self.fallback = []
+        self._trie = {}
+        self._seq = 0
+        self._client = None
+
+    def attach(self, client):
+        if self._client is client:
+            return
+        if self._client is not None:
+            self._client.remove_event_handler(self.dispatch, events.NewMessage)
+        self._client = client
+        client.add_event_handler(self.dispatch, events.NewMessage)
+
+    def add(self, client, pattern: str, handler):
+        self.attach(client)
+        self._seq += 1
+        route = CommandRoute(pattern, handler, self._seq)
+        self.routes.append(route)
+        self._index(route)
+        return route
+
+    def _index(self, route):
+        if route.prefix is None:
+            self.fallback.append(route)
+            return
+        node = self._trie
+        for ch in route.prefix:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, []).append(route)
+
+    def remove(self, handler) -> int:
+        return self.remove_where(lambda route: route.handler is handler)
+
+    def remove_module(self, module_name: str) -> int:
+        return self.remove_where(
+            lambda route: getattr(route.handler, "__module__", None) == module_name
+        )
+
+    def remove_where(self, predicate) -> int:
+        removed = [route for route in self.routes if predicate(route)]
+        if not removed:
+            return 0
+        self.routes = [route for route in self.routes if not predicate(route)]
+        self._rebuild()
+        return len(removed)
+
+    def _rebuild(self):
+        self.fallback = []
+        self._trie = {}
+        for route in self.routes:
+            self._index(route)
+
+    def candidates(self, text: str):
+        found = list(self.fallback)
+        if text.startswith("."):
+            node = self._trie
+            found.extend(node.get(None, ()))
+            for ch in text[1:]:
+                node = node.get(ch)
+                if node is None:
+                    break
+                found.extend(node.get(None, ()))
+        if len(found) > 1:
+            found.sort(key=lambda route: route.seq)
+        return found
+
+    async def dispatch(self, event, module_name=None):
+        text = event.message.message or ""
+        for route in self.candidates(text):
+            if module_name is not None and getattr(route.handler, "__module__", None) != module_name:
+                continue
+            start = time.perf_counter_ns()
+            match = route.regex.match(text)
+            route.match_ns += time.perf_counter_ns() - start
+            if not match:
+                continue
+
+            route.hits += 1
+            event.pattern_match = match
+            try:
+                await route.handler(event)
+            except events.StopPropagation:
+                raise
+            except Exception as e:
+                name = getattr(route.handler, "__name__", repr(route.handler))
+                print(f"[FAUST] Ошибка в обработчике {name}: {e}")
+
+    def stats(self):
+        return {
+            route.pattern: {
+                "module": getattr(route.handler, "__module__", None),
+                "hits": route.hits,
+                "match_us": route.match_ns / 1000,
+            }
+            for route in self.routes
+        }
+
+ROUTER = CommandRouter()
+
+def get_command_stats():
+    return ROUTER.stats()
+
 def register_command(client, module_name: str, pattern: str, desc: str = ""):
 
     if module_name not in REGISTERED_COMMANDS:
@@ -16,29 +179,16 @@ def register_command(client, module_name: str, pattern: str, desc: str = ""):
     REGISTERED_COMMANDS[module_name].append((pattern, desc))
 
     def decorator(func):
-        return client.on(events.NewMessage(pattern=pattern))(func)
+        ROUTER.add(client, pattern, func)
+        return func
 
     return decorator
 
-class FakeDB:
-    def __init__(self):
-        self.storage = {}
-
-    def set(self, module, key, value):
-        if module not in self.storage:
-            self.storage[module] = {}
-        self.storage[module][key] = value
-
-    def get(self, module, key, default=None):
-        return self.storage.get(module, {}).get(key, default)
-
 class LoaderEnv:
     class Module:
         def __init__(self):
             self.strings = {"name": self.__class__.__name__}
-            if not hasattr(LoaderEnv, "_db"):
-                LoaderEnv._db = FakeDB()
-            self._db = LoaderEnv._db
+            self._db = DB
 
     @staticmethod
     def sudo(func):
@@ -71,8 +221,16 @@ MODULES_DIR = os.path.join(ROOT, "modules")
 NATIVE_MODULES_DIR = os.path.join(ROOT, "native_modules")
 FTG_MODULES_DIR = os.path.join(ROOT, "ftg_modules")
 
+MANIFEST_PATH = os.path.join(ROOT, ".module_manifest.json")
+LAZY_MODULES = os.getenv("FAUST_LAZY_MODULES", "1") == "1"
+IMPORT_WORKERS = int(os.getenv("FAUST_IMPORT_WORKERS", "4"))
+
 LOADED_MODULES = {}
 LOADED_HANDLERS = {}
+STARTUP_TIMINGS = []
+
+_import_pool = None
+_LAZY_ACTIVATIONS = {}
 
 _old_edit = Message.edit
 async def edit_patch(self, text=None, **kwargs):
@@ -81,41 +239,177 @@ async def edit_patch(self, text=None, **kwargs):
     return await _old_edit(self, text, **kwargs)
 Message.edit = edit_patch
 
-def _install_package(pkg_name):
+PIP_ALIASES = {
+    "PIL": "pillow",
+    "cv2": "opencv-python",
+    "yaml": "PyYAML",
+    "bs4": "beautifulsoup4",
+    "sklearn": "scikit-learn",
+    "dateutil": "python-dateutil",
+    "telegram": "python-telegram-bot",
+}
+PIP_PROGRESS_INTERVAL = 2.0
+
+_REQUIREMENTS = {}
+
+def _requirement_name(module_name: str) -> str:
+    top = module_name.split(".")[0]
+    return PIP_ALIASES.get(top, top)
+
+async def _pip_install(pkg_name, progress=None) -> bool:
     print(f"[FAUST] Установка пакета: {pkg_name}")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", pkg_name])
+    if progress:
+        await progress(f"Установка пакета <code>{pkg_name}</code>...")
+
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "pip", "install", pkg_name,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    last_line = ""
+    last_progress = time.monotonic()
+    async for raw in proc.stdout:
+        line = raw.decode(errors="replace").strip()
+        if not line:
+            continue
+        last_line = line
+        if progress and time.monotonic() - last_progress >= PIP_PROGRESS_INTERVAL:
+            last_progress = time.monotonic()
+            await progress(f"Установка пакета <code>{pkg_name}</code>:\n<code>{line[:200]}</code>")
+
+    if await proc.wait() == 0:
+        importlib.invalidate_caches()
+        return True
+
+    print(f"[FAUST] Не удалось установить пакет {pkg_name}: {last_line}")
+    return False
+
+async def install_package(module_name: str, progress=None) -> bool:
+    pkg_name = _requirement_name(module_name)
+    task = _REQUIREMENTS.get(pkg_name)
+    if task is None:
+        task = asyncio.ensure_future(_pip_install(pkg_name, progress))
+        _REQUIREMENTS[pkg_name] = task
 
-def _import_module_from_path(path: str):
     try:
-        spec = importlib.util.spec_from_file_location(
-            os.path.splitext(os.path.basename(path))[0], path
-        )
-        mod = importlib.util.module_from_spec(spec)
+        ok = await asyncio.shield(task)
+    except Exception as e:
+        print(f"[FAUST] Ошибка установки пакета {pkg_name}: {e}")
+        ok = False
+
+    if not ok:
+        _REQUIREMENTS.pop(pkg_name, None)
+    return ok
+
+async def _import_with_requirements(importer, label: str, progress=None, attempts: int = 3):
+    tried = set()
+    for _ in range(attempts):
         try:
-            spec.loader.exec_module(mod)
+            return importer()
         except ModuleNotFoundError as e:
-            _install_package(e.name)
-            spec.loader.exec_module(mod)
-        return mod
-    except Exception as e:
-        print(f"[FAUST] Ошибка импорта {path}: {e}")
-        return None
+            if not e.name or e.name in tried:
+                print(f"[FAUST] Ошибка импорта {label}: {e}")
+                return None
+            tried.add(e.name)
+            if not await install_package(e.name, progress):
+                return None
+        except Exception as e:
+            print(f"[FAUST] Ошибка импорта {label}: {e}")
+            return None
+    return None
 
-def _import_ftg_module(name: str):
+def _exec_module_from_path(path: str):
+    spec = importlib.util.spec_from_file_location(
+        os.path.splitext(os.path.basename(path))[0], path
+    )
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+async def _import_module_from_path(path: str, progress=None):
+    return await _import_with_requirements(
+        lambda: _exec_module_from_path(path), path, progress
+    )
+
+def _exec_ftg_module(name: str):
+    full_name = f"{PACKAGE_NAME}.ftg_modules.{name}"
+    if full_name in sys.modules:
+        return importlib.reload(sys.modules[full_name])
+    return importlib.import_module(full_name)
+
+async def _import_ftg_module(name: str, progress=None):
+    return await _import_with_requirements(
+        lambda: _exec_ftg_module(name), name, progress
+    )
+
+def _get_import_pool():
+    global _import_pool
+    if _import_pool is None:
+        _import_pool = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="faust-import")
+    return _import_pool
+
+def _timed_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+async def _prefetch(executor, fallback, arg):
+    loop = asyncio.get_running_loop()
     try:
-        full_name = f"{PACKAGE_NAME}.ftg_modules.{name}"
-        if full_name in sys.modules:
-            mod = importlib.reload(sys.modules[full_name])
-        else:
-            try:
-                mod = importlib.import_module(full_name)
-            except ModuleNotFoundError as e:
-                _install_package(e.name)
-                mod = importlib.import_module(full_name)
-        return mod
+        return await loop.run_in_executor(_get_import_pool(), _timed_call, executor, arg)
+    except ModuleNotFoundError:
+        return await fallback(arg), None
     except Exception as e:
-        print(f"[FAUST] Ошибка импорта {name}: {e}")
-        return None
+        print(f"[FAUST] Ошибка импорта {arg}: {e}")
+        return None, None
+
+async def _prefetch_all(executor, fallback, args):
+    return await asyncio.gather(*(_prefetch(executor, fallback, arg) for arg in args))
+
+async def _wait_previous(previous):
+    if previous is not None:
+        await asyncio.wait([previous])
+
+def _record_timing(name: str, kind: str, mode: str, import_ms, register_ms):
+    STARTUP_TIMINGS.append({
+        "name": name,
+        "kind": kind,
+        "mode": mode,
+        "import_ms": import_ms,
+        "register_ms": register_ms,
+    })
+
+def format_startup_report(limit: int = 10) -> str:
+    if not STARTUP_TIMINGS:
+        return "[FAUST] Модули не загружались."
+
+    def total(item):
+        return (item["import_ms"] or 0) + (item["register_ms"] or 0)
+
+    counts = {}
+    for item in STARTUP_TIMINGS:
+        counts[item["mode"]] = counts.get(item["mode"], 0) + 1
+    summary = ", ".join(f"{mode}: {count}" for mode, count in sorted(counts.items()))
+
+    lines = [f"[FAUST] Загрузка модулей ({summary}), самые медленные:"]
+    for item in sorted(STARTUP_TIMINGS, key=total, reverse=True)[:limit]:
+        import_ms = "—" if item["import_ms"] is None else f"{item['import_ms']:.0f}"
+        lines.append(
+            f"[FAUST]   {item['kind']}:{item['name']} [{item['mode']}] "
+            f"импорт {import_ms} мс, регистрация {item['register_ms']:.0f} мс"
+        )
+    return "\n".join(lines)
+
+def _forget_commands(commands):
+    for command in commands:
+        registered = REGISTERED_COMMANDS.get(command["module"])
+        if not registered:
+            continue
+        entry = (command["pattern"], command["desc"])
+        if entry in registered:
+            registered.remove(entry)
+        if not registered:
+            REGISTERED_COMMANDS.pop(command["module"], None)
 
 def _unload_module(name, client):
     if name not in LOADED_MODULES:
@@ -124,15 +418,16 @@ def _unload_module(name, client):
     _, mod, *_ = LOADED_MODULES[name]
     mod_module_name = getattr(mod, "__module__", None) or getattr(mod, "__name__", None)
 
-    to_remove = []
-    for cmd, handler in list(LOADED_HANDLERS.items()):
-        if handler.__module__ == mod_module_name:
-            try:
-                client.remove_event_handler(handler, events.NewMessage)
-            except Exception:
-                pass
-            to_remove.append(cmd)
+    ROUTER.remove_module(mod_module_name)
 
+    lazy_commands = getattr(mod, "__faust_lazy__", None)
+    if lazy_commands:
+        _forget_commands(lazy_commands)
+
+    to_remove = [
+        cmd for cmd, handler in LOADED_HANDLERS.items()
+        if handler.__module__ == mod_module_name
+    ]
     for cmd in to_remove:
         LOADED_HANDLERS.pop(cmd, None)
 
@@ -141,30 +436,21 @@ def _unload_module(name, client):
 
     LOADED_MODULES.pop(name, None)
 
-def load_ftg_module(path_or_name: str, client):
+def _resolve_ftg_module(path_or_name: str):
     if os.path.sep in path_or_name or path_or_name.endswith(".py"):
         file_path = os.path.abspath(path_or_name)
         name = os.path.splitext(os.path.basename(path_or_name))[0]
     else:
         file_path = os.path.abspath(os.path.join(FTG_MODULES_DIR, f"{path_or_name}.py"))
         name = path_or_name
+    return file_path, name
 
-    if not os.path.exists(file_path):
-        print(f"[FAUST] FTG-модуль не найден по пути: {file_path}")
-        return None
-
-    if name in LOADED_MODULES:
-        _unload_module(name, client)
-
-    mod = _import_ftg_module(name)
-    if mod is None:
-        return None
-
+def _register_ftg_module(mod, name: str, file_path: str, client):
     for obj in mod.__dict__.values():
         if isinstance(obj, type) and hasattr(obj, "strings") and isinstance(obj.strings, dict):
             try:
                 instance = obj()
-                instance._db = FakeDB()
+                instance._db = DB
                 display_name = instance.strings.get("name", name)
 
                 if display_name in LOADED_MODULES:
@@ -175,7 +461,6 @@ def load_ftg_module(path_or_name: str, client):
                         cmd_name = attr[:-3]
                         method = getattr(instance, attr)
 
-                        @client.on(events.NewMessage(pattern=fr"^\.{cmd_name}"))
                         async def handler(event, m=method):
                             orig_respond = event.respond
                             async def respond_patch(text, *args, **kwargs):
@@ -194,6 +479,7 @@ def load_ftg_module(path_or_name: str, client):
                             await m(event)
 
                         handler.__module__ = instance.__module__
+                        ROUTER.add(client, fr"^\.{re.escape(cmd_name)}", handler)
                         LOADED_HANDLERS[cmd_name] = handler
 
                 LOADED_MODULES[display_name] = ("ftg", instance, file_path, display_name)
@@ -204,18 +490,43 @@ def load_ftg_module(path_or_name: str, client):
 
     return None
 
-def load_all_ftg_modules(client, folder=FTG_MODULES_DIR):
-    if not os.path.exists(folder):
-        os.makedirs(folder)
-    for file in os.listdir(folder):
-        if file.endswith(".py") and not file.startswith("__"):
-            load_ftg_module(os.path.splitext(file)[0], client)
+async def load_ftg_module(path_or_name: str, client, progress=None):
+    file_path, name = _resolve_ftg_module(path_or_name)
 
-def load_native_module(path: str, client):
-    mod = _import_module_from_path(path)
+    if not os.path.exists(file_path):
+        print(f"[FAUST] FTG-модуль не найден по пути: {file_path}")
+        return None
+
+    if name in LOADED_MODULES:
+        _unload_module(name, client)
+
+    mod = await _import_ftg_module(name, progress)
     if mod is None:
         return None
 
+    return _register_ftg_module(mod, name, file_path, client)
+
+async def load_all_ftg_modules(client, folder=FTG_MODULES_DIR, previous=None):
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    names = [
+        os.path.splitext(file)[0] for file in os.listdir(folder)
+        if file.endswith(".py") and not file.startswith("__")
+    ]
+    for name in names:
+        if name in LOADED_MODULES:
+            _unload_module(name, client)
+
+    imported = await _prefetch_all(_exec_ftg_module, _import_ftg_module, names)
+    await _wait_previous(previous)
+    for name, (mod, import_ms) in zip(names, imported):
+        if mod is None:
+            continue
+        start = time.perf_counter()
+        _register_ftg_module(mod, name, os.path.join(folder, f"{name}.py"), client)
+        _record_timing(name, "ftg", "eager", import_ms, (time.perf_counter() - start) * 1000)
+
+def _register_native_module(path: str, mod, client):
     name = os.path.splitext(os.path.basename(path))[0]
 
     if name in LOADED_MODULES:
@@ -231,29 +542,140 @@ def load_native_module(path: str, client):
     else:
         return None
 
-def load_all_native_modules(client, folder=NATIVE_MODULES_DIR):
+def _register_lazy_module(path: str, commands, client):
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    if name in LOADED_MODULES:
+        _unload_module(name, client)
+
+    placeholder = types.ModuleType(name)
+    placeholder.__file__ = path
+    placeholder.__faust_lazy__ = commands
+
+    async def trigger(event):
+        await _dispatch_lazy(name, event, client)
+    trigger.__module__ = name
+
+    for command in commands:
+        REGISTERED_COMMANDS.setdefault(command["module"], []).append(
+            (command["pattern"], command["desc"])
+        )
+        ROUTER.add(client, command["pattern"], trigger)
+
+    LOADED_MODULES[name] = ("native", placeholder, path, name)
+    return placeholder
+
+async def _dispatch_lazy(name: str, event, client):
+    entry = LOADED_MODULES.get(name)
+    if entry is None or not hasattr(entry[1], "__faust_lazy__"):
+        return
+
+    task = _LAZY_ACTIVATIONS.get(name)
+    if task is None:
+        task = asyncio.ensure_future(_activate_lazy_module(name, entry[1], entry[2], client))
+        _LAZY_ACTIVATIONS[name] = task
+
+    if await asyncio.shield(task) is not None:
+        await ROUTER.dispatch(event, module_name=name)
+
+async def _activate_lazy_module(name: str, placeholder, path: str, client):
+    try:
+        mod, import_ms = await _prefetch(_exec_module_from_path, _import_module_from_path, path)
+        entry = LOADED_MODULES.get(name)
+        if entry is None or entry[1] is not placeholder:
+            return None
+
+        _unload_module(name, client)
+        if mod is None:
+            print(f"[FAUST] Не удалось загрузить модуль {name} по первому вызову")
+            return None
+
+        start = time.perf_counter()
+        mod = _register_native_module(path, mod, client)
+        register_ms = (time.perf_counter() - start) * 1000
+        _record_timing(name, "native", "on-demand", import_ms, register_ms)
+        print(f"[FAUST] Модуль {name} загружен по первому вызову за {(import_ms or 0) + register_ms:.0f} мс")
+        return mod
+    finally:
+        _LAZY_ACTIVATIONS.pop(name, None)
+
+async def load_native_module(path: str, client, progress=None):
+    mod = await _import_module_from_path(path, progress)
+    if mod is None:
+        return None
+
+    return _register_native_module(path, mod, client)
+
+async def load_all_native_modules(client, folder=NATIVE_MODULES_DIR, previous=None):
     if not os.path.exists(folder):
         os.makedirs(folder)
+
+    manifest = ManifestCache(MANIFEST_PATH) if LAZY_MODULES else None
+    lazy, eager = [], []
     for file in os.listdir(folder):
-        if file.endswith(".py") and not file.startswith("__"):
-            load_native_module(os.path.join(folder, file), client)
+        if not file.endswith(".py") or file.startswith("__"):
+            continue
+        path = os.path.join(folder, file)
+        entry = None
+        if manifest is not None:
+            try:
+                entry = manifest.get(path)
+            except OSError:
+                entry = None
+
+        if entry and entry["lazy"]:
+            lazy.append((path, entry["commands"]))
+        else:
+            eager.append(path)
+
+    if manifest is not None:
+        manifest.save()
+
+    imported = await _prefetch_all(_exec_module_from_path, _import_module_from_path, eager)
+    await _wait_previous(previous)
+    for path, commands in lazy:
+        start = time.perf_counter()
+        _register_lazy_module(path, commands, client)
+        _record_timing(
+            os.path.splitext(os.path.basename(path))[0], "native", "lazy", None,
+            (time.perf_counter() - start) * 1000
+        )
+    for path, (mod, import_ms) in zip(eager, imported):
+        if mod is None:
+            continue
+        start = time.perf_counter()
+        _register_native_module(path, mod, client)
+        _record_timing(
+            os.path.splitext(os.path.basename(path))[0], "native", "eager",
+            import_ms, (time.perf_counter() - start) * 1000
+        )
 
-def load_builtin_modules(client, folder=MODULES_DIR):
+async def load_builtin_modules(client, folder=MODULES_DIR, previous=None):
     if not os.path.exists(folder):
         os.makedirs(folder)
-    for file in os.listdir(folder):
-        if file.endswith(".py") and not file.startswith("__"):
-            mod = _import_module_from_path(os.path.join(folder, file))
-            if mod and hasattr(mod, "register"):
-                try:
-                    mod.register(client)
-                except Exception:
-                    pass
-
-def load_all_modules(client):
-    load_builtin_modules(client)
-    load_all_native_modules(client)
-    load_all_ftg_modules(client)
+    paths = [
+        os.path.join(folder, file) for file in os.listdir(folder)
+        if file.endswith(".py") and not file.startswith("__")
+    ]
+    imported = await _prefetch_all(_exec_module_from_path, _import_module_from_path, paths)
+    await _wait_previous(previous)
+    for path, (mod, import_ms) in zip(paths, imported):
+        if mod and hasattr(mod, "register"):
+            start = time.perf_counter()
+            try:
+                mod.register(client)
+            except Exception:
+                pass
+            _record_timing(
+                os.path.splitext(os.path.basename(path))[0], "builtin", "eager",
+                import_ms, (time.perf_counter() - start) * 1000
+            )
+
+async def load_all_modules(client):
+    builtin = asyncio.ensure_future(load_builtin_modules(client))
+    native = asyncio.ensure_future(load_all_native_modules(client, previous=builtin))
+    ftg = asyncio.ensure_future(load_all_ftg_modules(client, previous=native))
+    await asyncio.gather(builtin, native, ftg)
 
 def get_loaded_modules():
     return LOADED_MODULES
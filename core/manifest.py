@@ -0,0 +1,128 @@
+import os
+import ast
+import json
+import hashlib
+
+MANIFEST_VERSION = 3
+
+def _call_name(node) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+def _literal(node, default=None):
+    if node is None:
+        return default
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, SyntaxError):
+        return None
+
+def _is_plain_value(node) -> bool:
+    try:
+        ast.literal_eval(node)
+        return True
+    except (ValueError, SyntaxError):
+        return False
+
+def _command_from_decorator(decorator):
+    if not isinstance(decorator, ast.Call) or _call_name(decorator.func) != "register_command":
+        return None
+
+    params = {"client": None, "module_name": None, "pattern": None, "desc": None}
+    for key, value in zip(params, decorator.args):
+        params[key] = value
+    for keyword in decorator.keywords:
+        if keyword.arg in params:
+            params[keyword.arg] = keyword.value
+
+    module_name = _literal(params["module_name"])
+    pattern = _literal(params["pattern"])
+    desc = _literal(params["desc"], "")
+    if not isinstance(module_name, str) or not isinstance(pattern, str) or not isinstance(desc, str):
+        return None
+    return {"module": module_name, "pattern": pattern, "desc": desc}
+
+def scan_native_module(source: str) -> dict:
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return {"lazy": False, "commands": []}
+
+    register = next(
+        (node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "register"),
+        None
+    )
+    if register is None:
+        return {"lazy": False, "commands": []}
+
+    commands = []
+    for stmt in register.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in stmt.decorator_list:
+                command = _command_from_decorator(decorator)
+                if command is None:
+                    return {"lazy": False, "commands": []}
+                commands.append(command)
+        elif isinstance(stmt, ast.Assign) and _is_plain_value(stmt.value):
+            continue
+        elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+            continue
+        else:
+            return {"lazy": False, "commands": []}
+
+    return {"lazy": bool(commands), "commands": commands}
+
+class ManifestCache:
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("modules", {})
+        except Exception:
+            self.entries = {}
+
+    def get(self, module_path: str) -> dict:
+        stat = os.stat(module_path)
+        cached = self.entries.get(module_path)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["manifest"]
+
+        with open(module_path, "rb") as f:
+            source = f.read()
+        digest = hashlib.sha1(source).hexdigest()
+
+        if cached and cached["sha1"] == digest:
+            manifest = cached["manifest"]
+        else:
+            manifest = scan_native_module(source.decode("utf-8", errors="replace"))
+
+        self.entries[module_path] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": digest,
+            "manifest": manifest,
+        }
+        self.changed = True
+        return manifest
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "modules": self.entries}, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            self.changed = False
+        except Exception as e:
+            print(f"[FAUST] Не удалось сохранить манифест модулей: {e}")
@@ -1,8 +1,9 @@
 import logging
 import asyncio
 import os
+import time
 from pathlib import Path
-from telethon import events
+from telethon import events, errors
 from telethon.tl.custom.message import Message
 from faust_tool.ai import brain
 from faust_tool.ai import state
@@ -10,6 +11,47 @@ from faust_tool.ai import state
 logger = logging.getLogger("faust_assistant")
 reply_lock = asyncio.Lock()
 
+EDIT_INTERVAL = float(os.getenv("FAUST_EDIT_INTERVAL", "1.5"))
+MAX_MESSAGE_LENGTH = 4096
+
+class ThrottledEditor:
+    def __init__(self, message: Message, interval: float = EDIT_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self._pending = ""
+        self._shown = ""
+        self._last_edit = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def update(self, text: str):
+        self._pending = text
+        if self._task is None or self._task.done():
+            delay = max(0.0, self._last_edit + self.interval - time.monotonic())
+            self._task = asyncio.create_task(self._edit_later(delay))
+
+    async def _edit_later(self, delay: float):
+        await asyncio.sleep(delay)
+        text = self._pending[:MAX_MESSAGE_LENGTH - 2]
+        if not text or text == self._shown:
+            return
+        self._last_edit = time.monotonic()
+        try:
+            await self.message.edit(text + " ▌")
+            self._shown = text
+        except errors.FloodWaitError as e:
+            self.interval = max(self.interval, float(e.seconds))
+        except Exception:
+            pass
+
+    async def finish(self, text: str):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.message.edit(text)
+
 def register(client):
     async def init_owner():
         try:
@@ -33,14 +75,15 @@ def register(client):
         query = event.pattern_match.group(1).strip()
         logger.info("AI_CMD | user_id=%s query=%r", user_id, query)
         thinking_msg = await event.edit("Думаю…")
+        editor = ThrottledEditor(thinking_msg)
         try:
-            answer = await brain.analyze(query, user_id)
+            answer = await brain.analyze(query, user_id, on_update=editor.update)
             if not isinstance(answer, str):
                 answer = str(answer)
-            await thinking_msg.edit(answer)
+            await editor.finish(answer)
             logger.info("Responded to .ai query=%r", query)
         except Exception:
-            await thinking_msg.edit("Ошибка при обработке запроса. Смотри логи.")
+            await editor.finish("Ошибка при обработке запроса. Смотри логи.")
             logger.exception("Exception while processing .ai query=%r", query)
 
     logger.info("Модуль AI зарегистрирован (только исходящие команды)")
@@ -1,5 +1,5 @@
 import os
-import requests
+import aiohttp
 import zipfile
 import subprocess
 import sys
@@ -7,6 +7,7 @@ import shutil
 import tempfile
 from telethon import events
 from telethon.tl.custom.message import Message
+from faust_tool.core import http
 
 def register(client):
     @client.on(events.NewMessage(outgoing=True, pattern=r'^\.update$'))
@@ -28,11 +29,7 @@ def register(client):
             
             zip_path = os.path.join(temp_dir, "update.zip")
             
-            response = requests.get(zip_url, timeout=30)
-            response.raise_for_status()
-            
-            with open(zip_path, 'wb') as f:
-                f.write(response.content)
+            await http.download(zip_url, zip_path, timeout=30)
             
             if not os.path.exists(zip_path) or os.path.getsize(zip_path) == 0:
                 raise Exception("Файл обновления пуст или не скачался")
@@ -126,7 +123,7 @@ def register(client):
             client.disconnect()
             return
             
-        except requests.RequestException as e:
+        except aiohttp.ClientError as e:
             await event.edit(f"Ошибка сети при скачивании: {e}")
         except zipfile.BadZipFile:
             await event.edit("Скачанный файл не является ZIP архивом")
@@ -1,8 +1,8 @@
 import io
-import requests
 import asyncio
 from g4f.client import Client as G4FClient
 from faust_tool.core.loader import register_command
+from faust_tool.core import http
 
 g4f_client = G4FClient()
 
@@ -66,7 +66,7 @@ def register(client):
         try:
             await event.edit("Генерирую изображение...")
             image_url = await generate_image_url(prompt)
-            img_data = requests.get(image_url, headers=HEADERS).content
+            img_data = await http.fetch(image_url, headers=HEADERS)
             image = io.BytesIO(img_data)
             image.name = "generated.png"
 
@@ -1,8 +1,45 @@
 import asyncio
-from telethon import events
+from telethon import errors
+from telethon.tl.types import InputDocument
 from faust_tool.core.loader import register_command
+from faust_tool.core.conversation import BotConversation
+from faust_tool.core.db import DB
 
 BOT_USERNAME = "Buddy_musicbot"
+CACHE_NAMESPACE = "music_cache"
+
+def _cache_key(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def _remember(query: str, message):
+    document = message.document
+    if document is None:
+        return
+    DB.set(CACHE_NAMESPACE, _cache_key(query), [
+        document.id, document.access_hash, document.file_reference.hex(),
+        message.chat_id, message.id,
+    ])
+
+async def _send_cached(client, event, query: str):
+    entry = DB.get(CACHE_NAMESPACE, _cache_key(query))
+    if not entry:
+        return None
+
+    doc_id, access_hash, file_reference, chat_id, msg_id = entry
+    media = InputDocument(doc_id, access_hash, bytes.fromhex(file_reference))
+    try:
+        return await client.send_file(event.chat_id, media, reply_to=event.reply_to_msg_id)
+    except errors.FileReferenceExpiredError:
+        pass
+
+    try:
+        source = await client.get_messages(chat_id, ids=msg_id)
+        if source and source.document:
+            return await client.send_file(event.chat_id, source.media, reply_to=event.reply_to_msg_id)
+    except Exception:
+        pass
+    DB.pop(CACHE_NAMESPACE, _cache_key(query))
+    return None
 
 def register(client):
     @register_command(client, "music", r"\.music(?:\s+(.*))?", "Скачивание музыки")
@@ -21,39 +58,37 @@ def register(client):
         await event.edit("Поиск...")
 
         try:
-            async with client.conversation(BOT_USERNAME, timeout=60) as conv:
-                await conv.send_message("/start")
-                await asyncio.sleep(1)
+            sent = await _send_cached(client, event, text)
+            if sent is not None:
+                _remember(text, sent)
+                await event.delete()
+                return
+
+            async with BotConversation(client, BOT_USERNAME, timeout=60) as conv:
+                await conv.send("/start")
 
-                msg1 = await conv.get_response()
-                if not msg1.buttons:
+                msg1 = await conv.wait_for(lambda m: m.buttons, strict=True)
+                if msg1 is None:
                     await event.edit("Музыка не найдена.")
                     return
+                await conv.click(msg1, 0, 0)
 
-                await msg1.click(0, 0)
-                await asyncio.sleep(1)
+                await conv.send(text)
 
-                await conv.send_message(text)
-                await asyncio.sleep(2)
-
-                msg2 = await conv.get_response()
-                if not msg2.buttons or len(msg2.buttons) < 2 or len(msg2.buttons[1]) < 1:
+                msg2 = await conv.wait_for(lambda m: m.buttons and len(m.buttons) >= 2 and len(m.buttons[1]) >= 1, strict=True)
+                if msg2 is None:
                     await event.edit("Музыка не найдена.")
                     return
+                await conv.click(msg2, 1, 0)
 
-                await msg2.click(1, 0)
-                await asyncio.sleep(0.5)
-
-                music_msg = await conv.get_response()
-                if music_msg.document or music_msg.audio or music_msg.voice:
-                    await client.send_file(event.chat_id, music_msg.media, reply_to=event.reply_to_msg_id)
-                    await event.delete()
-                else:
+                music_msg = await conv.wait_for(lambda m: m.document or m.audio or m.voice, strict=True)
+                if music_msg is None:
                     await event.edit("Музыка не найдена.")
+                    return
+                sent = await client.send_file(event.chat_id, music_msg.media, reply_to=event.reply_to_msg_id)
+                _remember(text, sent)
+                await event.delete()
+        except asyncio.TimeoutError:
+            await event.edit("Музыка не найдена.")
         except Exception as e:
             await event.edit(f"Ошибка: {e}")
-
-        try:
-            await client.delete_dialog(BOT_USERNAME)
-        except:
-            pass
@@ -1,56 +1,100 @@
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
 from telethon import events
 from faust_tool.core.loader import register_command
+from faust_tool.core.db import DB
 
-last_response = {}
-response_text = ""
-cooldown_time = timedelta(days=1)
+SETTINGS_NAMESPACE = "respond"
+DEFAULT_COOLDOWN = 24 * 3600
+MAX_TRACKED = 10000
+SENDER_CACHE_SIZE = 1024
+SENDER_CACHE_TTL = 600
 
-exclude_contacts = False
-excluded_ids = set()
+settings = {
+    "text": DB.get(SETTINGS_NAMESPACE, "text", ""),
+    "cooldown": DB.get(SETTINGS_NAMESPACE, "cooldown", DEFAULT_COOLDOWN),
+    "exclude_contacts": DB.get(SETTINGS_NAMESPACE, "exclude_contacts", False),
+}
+excluded_ids = set(DB.get(SETTINGS_NAMESPACE, "excluded_ids", []))
+
+_cooldowns = OrderedDict()
+_senders = OrderedDict()
+
+def _save(key, value):
+    settings[key] = value
+    DB.set(SETTINGS_NAMESPACE, key, value)
+
+def _save_excluded():
+    DB.set(SETTINGS_NAMESPACE, "excluded_ids", sorted(excluded_ids))
+
+def _prune_cooldowns(now: float):
+    while _cooldowns:
+        user_id, expires = next(iter(_cooldowns.items()))
+        if expires > now and len(_cooldowns) <= MAX_TRACKED:
+            break
+        del _cooldowns[user_id]
+
+def _on_cooldown(user_id: int, now: float) -> bool:
+    _prune_cooldowns(now)
+    return user_id in _cooldowns
+
+def _start_cooldown(user_id: int, now: float):
+    _cooldowns.pop(user_id, None)
+    _cooldowns[user_id] = now + settings["cooldown"]
+    _prune_cooldowns(now)
+
+async def _sender_flags(event):
+    now = time.monotonic()
+    cached = _senders.get(event.sender_id)
+    if cached is not None and cached[2] > now:
+        _senders.move_to_end(event.sender_id)
+        return cached[0], cached[1]
+
+    sender = event.sender or await event.get_sender()
+    if sender is None:
+        return None
+    flags = (bool(getattr(sender, "bot", False)), bool(getattr(sender, "contact", False)))
+    _senders[event.sender_id] = (*flags, now + SENDER_CACHE_TTL)
+    _senders.move_to_end(event.sender_id)
+    while len(_senders) > SENDER_CACHE_SIZE:
+        _senders.popitem(last=False)
+    return flags
 
 def register(client):
     @register_command(client, "respond_onoff", r"\.respond (on|off)(?:\s+(.*))?", "Автоответчик: включить/выключить")
     async def toggle_responder(event):
-        global response_text
         command = event.pattern_match.group(1)
         text = event.pattern_match.group(2)
 
         if command == "on" and text:
-            response_text = text
+            _save("text", text)
             await event.edit("Автоответчик включен.")
         elif command == "off":
-            response_text = ""
+            _save("text", "")
+            _cooldowns.clear()
             await event.edit("Автоответчик отключен.")
         else:
             await event.edit("Использование:\n.respond on <текст>\n.respond off")
 
     @register_command(client, "respond_time", r"\.respond time (\d+) (h|m|s)", "Установить перезарядку автоответчика")
     async def set_cooldown(event):
-        global cooldown_time
         value = int(event.pattern_match.group(1))
         unit = event.pattern_match.group(2)
 
-        if unit == "h":
-            cooldown_time = timedelta(hours=value)
-        elif unit == "m":
-            cooldown_time = timedelta(minutes=value)
-        elif unit == "s":
-            cooldown_time = timedelta(seconds=value)
+        _save("cooldown", value * {"h": 3600, "m": 60, "s": 1}[unit])
+        _cooldowns.clear()
 
         await event.edit(f"Перезарядка автоответчика установлена на {value} {unit}.")
 
     @register_command(client, "respond_contacts", r"\.respond ([+-])contacts", "Вкл/выкл ответы контактам")
     async def toggle_contacts_exclusion(event):
-        global exclude_contacts
         sign = event.pattern_match.group(1)
-        exclude_contacts = (sign == "-")
-        status = "не отвечать контактам" if exclude_contacts else "снова отвечать контактам"
+        _save("exclude_contacts", sign == "-")
+        status = "не отвечать контактам" if settings["exclude_contacts"] else "снова отвечать контактам"
         await event.edit(f"Автоответчик теперь будет {status}.")
 
     @register_command(client, "respond_id", r"\.respond ([+-])id (\d+)", "Вкл/выкл ответы конкретному ID")
     async def toggle_id_exclusion(event):
-        global excluded_ids
         sign = event.pattern_match.group(1)
         user_id = int(event.pattern_match.group(2))
 
@@ -60,25 +104,24 @@ def register(client):
         else:
             excluded_ids.discard(user_id)
             await event.edit(f"Автоответчик включен для пользователя с ID {user_id}.")
+        _save_excluded()
 
-    @client.on(events.NewMessage(incoming=True))
+    @client.on(events.NewMessage(incoming=True, func=lambda e: e.is_private and bool(settings["text"])))
     async def auto_respond(event):
-        global last_response, response_text, cooldown_time
-        if not response_text or not event.is_private:
+        user_id = event.sender_id
+        if user_id is None or user_id in excluded_ids:
             return
 
-        sender = await event.get_sender()
-        if sender is None or sender.bot:
+        now = time.monotonic()
+        if _on_cooldown(user_id, now):
             return
 
-        user_id = sender.id
-
-        if user_id in excluded_ids:
+        flags = await _sender_flags(event)
+        if flags is None:
             return
-        if exclude_contacts and sender.contact:
+        is_bot, is_contact = flags
+        if is_bot or (settings["exclude_contacts"] and is_contact):
             return
 
-        now = datetime.now()
-        if user_id not in last_response or now - last_response[user_id] >= cooldown_time:
-            last_response[user_id] = now
-            await event.reply(response_text)
+        _start_cooldown(user_id, now)
+        await event.reply(settings["text"])
@@ -1,8 +1,57 @@
+import os
+import asyncio
 import pytesseract
 from PIL import Image
 from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from faust_tool.core.loader import register_command
 
+OCR_LANG = "eng+rus"
+OCR_WORKERS = int(os.getenv("FAUST_OCR_WORKERS", "2"))
+OCR_MAX_PENDING = int(os.getenv("FAUST_OCR_MAX_PENDING", "8"))
+OCR_MAX_SIDE = int(os.getenv("FAUST_OCR_MAX_SIDE", "2000"))
+OCR_CACHE_SIZE = 256
+
+_pool = None
+_slots = None
+_pending = 0
+_cache = OrderedDict()
+
+def _get_pool():
+    global _pool, _slots
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        _slots = asyncio.Semaphore(OCR_WORKERS)
+    return _pool
+
+def _prepare_image(image_bytes: bytes) -> Image.Image:
+    image = Image.open(BytesIO(image_bytes))
+    if "A" in image.getbands() or image.mode == "P":
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, "white")
+        image = Image.alpha_composite(background, image)
+    image = image.convert("L")
+    if max(image.size) > OCR_MAX_SIDE:
+        image.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE))
+    return image
+
+def _media_key(message):
+    media = message.photo or message.document
+    if media is None:
+        return None
+    return type(media).__name__, media.id
+
+async def _recognize(image_bytes: bytes) -> str:
+    pool = _get_pool()
+    image = await asyncio.to_thread(_prepare_image, image_bytes)
+    async with _slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            pool, partial(pytesseract.image_to_string, image, lang=OCR_LANG)
+        )
+
 def register(client):
     @register_command(
         client,
@@ -11,6 +60,7 @@ def register(client):
         "Распознаёт текст на изображении (OCR). Использование: .text (в ответ на фото/стикер/файл)"
     )
     async def recognize_text(event):
+        global _pending
         await event.edit('Обрабатываю...')
 
         reply_msg = await event.get_reply_message()
@@ -22,9 +72,26 @@ def register(client):
             await event.edit('Ответь на изображение или стикер.')
             return
 
+        key = _media_key(reply_msg)
+        if key in _cache:
+            _cache.move_to_end(key)
+            await event.edit(_cache[key] or 'Текст не распознан.')
+            return
+
+        if _pending >= OCR_MAX_PENDING:
+            await event.edit('Очередь распознавания заполнена, попробуй позже.')
+            return
+
+        _pending += 1
         try:
             image_bytes = await event.client.download_media(reply_msg, bytes)
-            text = pytesseract.image_to_string(Image.open(BytesIO(image_bytes)), lang='eng+rus')
+            text = (await _recognize(image_bytes)).strip()
+            if key is not None:
+                _cache[key] = text
+                while len(_cache) > OCR_CACHE_SIZE:
+                    _cache.popitem(last=False)
             await event.edit(text or 'Текст не распознан.')
         except Exception as e:
             await event.edit(f'Ошибка распознавания: {e}')
+        finally:
+            _pending -= 1
@@ -1,11 +1,181 @@
+import os
 import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from telethon import events
 from googletrans import Translator, LANGUAGES
 from faust_tool.core.loader import register_command
 
+CACHE_SIZE = int(os.getenv("FAUST_TRANSLATE_CACHE", "1024"))
+WORKERS = int(os.getenv("FAUST_TRANSLATE_WORKERS", "2"))
+BATCH_WINDOW = float(os.getenv("FAUST_TRANSLATE_BATCH_WINDOW", "0.4"))
+BATCH_MAX = 10
+BATCH_SEPARATOR = "\n|||\n"
+
+_SCRIPT_RANGES = [
+    (0x0041, 0x024F, "latin"),
+    (0x0370, 0x03FF, "greek"),
+    (0x0400, 0x04FF, "cyrillic"),
+    (0x0530, 0x058F, "armenian"),
+    (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"),
+    (0x0E00, 0x0E7F, "thai"),
+    (0x10A0, 0x10FF, "georgian"),
+    (0x1100, 0x11FF, "hangul"),
+    (0x3040, 0x30FF, "kana"),
+    (0x4E00, 0x9FFF, "han"),
+    (0xAC00, 0xD7AF, "hangul"),
+]
+_SINGLE_SCRIPT_LANGS = {
+    "greek": {"el"},
+    "armenian": {"hy"},
+    "hebrew": {"iw", "he"},
+    "thai": {"th"},
+    "georgian": {"ka"},
+    "hangul": {"ko"},
+}
+_RUSSIAN_ALPHABET = set("абвгдеёжзийклмнопрстуфхцчшщъыьэюя")
+_UKRAINIAN_ALPHABET = set("абвгґдеєжзиіїйклмнопрстуфхцчшщьюя")
+_RUSSIAN_ONLY = set("ыэё")
+_UKRAINIAN_ONLY = set("їєґ")
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="faust-translate")
+_cache = OrderedDict()
+
+def _script(ch: str):
+    code = ord(ch)
+    for start, end, name in _SCRIPT_RANGES:
+        if start <= code <= end:
+            return name
+    return None
+
+def _already_in(text: str, lang: str) -> bool:
+    counts = {}
+    letters = 0
+    for ch in text:
+        if ch.isalpha():
+            letters += 1
+            name = _script(ch)
+            counts[name] = counts.get(name, 0) + 1
+    if not letters:
+        return True
+
+    script, count = max(counts.items(), key=lambda item: item[1])
+    if count < letters * 0.9:
+        return False
+
+    if script == "cyrillic":
+        chars = {ch for ch in text.lower() if ch.isalpha() and _script(ch) == "cyrillic"}
+        if lang == "ru":
+            return chars <= _RUSSIAN_ALPHABET and bool(chars & _RUSSIAN_ONLY)
+        if lang == "uk":
+            return chars <= _UKRAINIAN_ALPHABET and bool(chars & _UKRAINIAN_ONLY)
+        return False
+    if script in ("kana", "han") and lang == "ja":
+        return "kana" in counts
+    if script == "han" and lang.startswith("zh"):
+        return "kana" not in counts
+    return lang in _SINGLE_SCRIPT_LANGS.get(script, ())
+
+def _cache_key(text: str, lang: str):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest(), lang
+
+def _cache_get(text: str, lang: str):
+    key = _cache_key(text, lang)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    return None
+
+def _cache_put(text: str, lang: str, translated):
+    _cache[_cache_key(text, lang)] = translated
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+def _changed(original: str, translated) -> bool:
+    return bool(translated) and translated.strip().lower() != original.strip().lower()
+
+def _translate_many(translator, texts, lang):
+    joined = translator.translate(BATCH_SEPARATOR.join(texts), dest=lang)
+    parts = joined.text.split("|||") if joined and joined.text else []
+    if len(parts) == len(texts):
+        return [part.strip() for part in parts]
+    return [
+        result.text if result.src and result.src != lang else None
+        for result in translator.translate(list(texts), dest=lang)
+    ]
+
+async def translate(translator, text: str, lang: str):
+    if _already_in(text, lang):
+        return None
+    cached = _cache_get(text, lang)
+    if cached is not None:
+        return cached or None
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_executor, lambda: translator.translate(text, dest=lang))
+    translated = result.text if result and result.src and result.src != lang else ""
+    _cache_put(text, lang, translated)
+    return translated or None
+
+class _ChatBatcher:
+    def __init__(self, translator):
+        self.translator = translator
+        self.pending = {}
+        self.timers = {}
+
+    def add(self, chat_id, lang: str, event):
+        key = (chat_id, lang)
+        batch = self.pending.setdefault(key, [])
+        batch.append(event)
+        if len(batch) >= BATCH_MAX:
+            self._flush_now(key)
+        elif key not in self.timers:
+            loop = asyncio.get_running_loop()
+            self.timers[key] = loop.call_later(BATCH_WINDOW, self._flush_now, key)
+
+    def _flush_now(self, key):
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(key, [])
+        if batch:
+            asyncio.ensure_future(self._flush(key[1], batch))
+
+    async def _flush(self, lang: str, batch):
+        texts = []
+        for event in batch:
+            if event.text not in texts:
+                texts.append(event.text)
+
+        try:
+            loop = asyncio.get_running_loop()
+            translated = await loop.run_in_executor(
+                _executor, _translate_many, self.translator, texts, lang
+            )
+        except Exception as e:
+            await batch[-1].reply(f"Ошибка перевода: {e}")
+            return
+
+        results = {}
+        for text, result in zip(texts, translated):
+            result = result if _changed(text, result) else ""
+            _cache_put(text, lang, result)
+            results[text] = result
+
+        for event in batch:
+            if results.get(event.text):
+                try:
+                    await event.reply(results[event.text])
+                except Exception:
+                    pass
+
 def register(client):
     translator = Translator()
     active_translations = {}
+    detect_chats = {}
+    batcher = _ChatBatcher(translator)
 
     @register_command(
         client,
@@ -48,60 +218,51 @@ def register(client):
         client,
         "trns_detect_on",
         r"\.trns detect on(?: (\w+))?",
-        "Автоматический перевод входящих: .trns detect on [код]"
+        "Автоматический перевод входящих в этом чате: .trns detect on [код]"
     )
     async def translate_detect_on(event):
         lang_code = (event.pattern_match.group(1) or "ru").lower()
         if lang_code not in LANGUAGES:
             await event.edit("Неверный код языка!")
             return
-        active_translations[event.sender_id] = {"mode": "detect", "lang": lang_code}
-        await event.edit(f"Автоматический перевод входящих сообщений на {LANGUAGES[lang_code].capitalize()} включен.")
+        detect_chats[event.chat_id] = lang_code
+        await event.edit(f"Автоматический перевод входящих сообщений в этом чате на {LANGUAGES[lang_code].capitalize()} включен.")
 
     @register_command(
         client,
         "trns_detect_off",
         r"\.trns detect off",
-        "Отключить авто-перевод входящих: .trns detect off"
+        "Отключить авто-перевод входящих в этом чате: .trns detect off"
     )
     async def translate_detect_off(event):
-        if (
-            event.sender_id in active_translations
-            and active_translations[event.sender_id]["mode"] == "detect"
-        ):
-            del active_translations[event.sender_id]
-            await event.edit("Автоматический перевод входящих сообщений отключен.")
+        if detect_chats.pop(event.chat_id, None) is not None:
+            await event.edit("Автоматический перевод входящих сообщений в этом чате отключен.")
         else:
             await event.edit("Режим автодетекта не был включён.")
 
     @client.on(events.NewMessage)
     async def auto_translate(event):
-        if (
-            event.sender_id in active_translations
-            and event.text
-            and not event.text.startswith(".")
-        ):
-            mode = active_translations[event.sender_id]["mode"]
-            lang = active_translations[event.sender_id]["lang"]
-
-            if event.out and mode == "direct":
-                try:
-                    loop = asyncio.get_event_loop()
-                    translated = await loop.run_in_executor(
-                        None, lambda: translator.translate(event.text, dest=lang)
-                    )
-                    if translated and translated.src and translated.src != lang:
-                        await event.edit(translated.text)
-                except Exception as e:
-                    await event.reply(f"Ошибка перевода: {e}")
-
-            elif not event.out and mode == "detect":
-                try:
-                    loop = asyncio.get_event_loop()
-                    translated = await loop.run_in_executor(
-                        None, lambda: translator.translate(event.text, dest=lang)
-                    )
-                    if translated and translated.src and translated.src != lang:
-                        await event.reply(translated.text)
-                except Exception as e:
-                    await event.reply(f"Ошибка перевода: {e}")
+        if not event.text or event.text.startswith("."):
+            return
+
+        if event.out:
+            settings = active_translations.get(event.sender_id)
+            if not settings:
+                return
+            try:
+                translated = await translate(translator, event.text, settings["lang"])
+                if translated:
+                    await event.edit(translated)
+            except Exception as e:
+                await event.reply(f"Ошибка перевода: {e}")
+
+        else:
+            lang = detect_chats.get(event.chat_id)
+            if lang is None or _already_in(event.text, lang):
+                return
+            cached = _cache_get(event.text, lang)
+            if cached is not None:
+                if cached:
+                    await event.reply(cached)
+                return
+            batcher.add(event.chat_id, lang, event)
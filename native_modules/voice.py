@@ -1,9 +1,83 @@
+import os
 import asyncio
+from collections import deque
 from telethon import events
-from telethon.tl.functions.messages import DeleteHistoryRequest
 from faust_tool.core.loader import register_command
 
+SPEECH_BOT = "@smartspeech_sber_bot"
+ACK_TEXT = "Аудиосообщение принято!"
+VOICE_TIMEOUT = float(os.getenv("FAUST_VOICE_TIMEOUT", "90"))
+
+class _Transcription:
+    __slots__ = ("sent_id", "ack_id", "future")
+
+    def __init__(self, future):
+        self.sent_id = None
+        self.ack_id = None
+        self.future = future
+
+class _Transcriber:
+    def __init__(self, client):
+        self.client = client
+        self.unacked = deque()
+        self.by_sent = {}
+        self.by_ack = {}
+
+    async def transcribe(self, message) -> str:
+        job = _Transcription(asyncio.get_running_loop().create_future())
+        self.unacked.append(job)
+        try:
+            sent = await self.client.send_message(SPEECH_BOT, message)
+            job.sent_id = sent.id
+            self.by_sent[sent.id] = job
+            return await asyncio.wait_for(job.future, VOICE_TIMEOUT)
+        finally:
+            self._forget(job)
+            ids = [i for i in (job.sent_id, job.ack_id) if i]
+            if ids:
+                try:
+                    await self.client.delete_messages(SPEECH_BOT, ids)
+                except Exception:
+                    pass
+
+    def _forget(self, job):
+        if job in self.unacked:
+            self.unacked.remove(job)
+        self.by_sent.pop(job.sent_id, None)
+        self.by_ack.pop(job.ack_id, None)
+
+    def _match(self, event):
+        job = self.by_sent.get(event.reply_to_msg_id)
+        if job is None and self.unacked:
+            job = self.unacked[0]
+        if job is not None and job in self.unacked:
+            self.unacked.remove(job)
+        return job
+
+    def _resolve(self, job, text: str):
+        if not job.future.done():
+            job.future.set_result(text)
+
+    async def on_message(self, event):
+        job = self._match(event)
+        if job is None:
+            return
+        job.ack_id = event.id
+        if event.raw_text.strip() == ACK_TEXT:
+            self.by_ack[event.id] = job
+        else:
+            self._resolve(job, event.text)
+
+    async def on_edit(self, event):
+        job = self.by_ack.get(event.id)
+        if job is not None and event.raw_text.strip() != ACK_TEXT:
+            self._resolve(job, event.text)
+
 def register(client):
+    transcriber = _Transcriber(client)
+    client.add_event_handler(transcriber.on_message, events.NewMessage(from_users=SPEECH_BOT))
+    client.add_event_handler(transcriber.on_edit, events.MessageEdited(from_users=SPEECH_BOT))
+
     @register_command(client, "voice", r"^\.voice$", "Распознать голосовое/видео")
     async def voice_command(event):
         if event.reply_to_msg_id:
@@ -13,37 +87,17 @@ def register(client):
                 await event.edit("Ответь на голосовое, видеосообщение или кружок.")
                 return
 
-            client._last_test_msg = await event.edit("Идет распознавание...")
-            client._awaiting_response = True
-
-            await client.send_message("@smartspeech_sber_bot", reply_msg)
+            status = await event.edit("Идет распознавание...")
+            try:
+                text = await transcriber.transcribe(reply_msg)
+                await status.edit(text or "Текст не распознан.")
+            except asyncio.TimeoutError:
+                await status.edit("Бот распознавания не ответил вовремя.")
+            except Exception as e:
+                await status.edit(f"Ошибка распознавания: {e}")
         else:
             await event.edit("Ответь на голосовое или видеосообщение, чтобы обработать его в речь.")
 
-    @client.on(events.NewMessage(from_users="@smartspeech_sber_bot"))
-    async def catch_initial_response(event):
-        if getattr(client, "_awaiting_response", False):
-            if event.raw_text.strip() == "Аудиосообщение принято!":
-                msg_id = event.id
-
-                for _ in range(90):
-                    latest_msg = await client.get_messages("@smartspeech_sber_bot", ids=msg_id)
-                    if latest_msg.text != "Аудиосообщение принято!":
-                        if hasattr(client, "_last_test_msg") and client._last_test_msg:
-                            await client._last_test_msg.edit(latest_msg.text)
-                            client._last_test_msg = None
-
-                        client._awaiting_response = False
-
-                        await client(DeleteHistoryRequest(
-                            peer="@smartspeech_sber_bot",
-                            max_id=0,
-                            just_clear=False
-                        ))
-                        return
-
-                    await asyncio.sleep(1)
-
     @register_command(client, "voice_detect_on", r"\.voice detect on", "Включить автообработку голосовых")
     async def voice_detect_on(event):
         if not hasattr(client, "_voice_detect"):
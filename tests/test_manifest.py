@@ -0,0 +1,22 @@
+from core.manifest import scan_native_module
+
+HEADER = "def register(client):\n"
+COMMAND = (
+    "    @register_command(client, 'demo', r'^\\.demo$', 'Демо')\n"
+    "    async def demo(event):\n"
+    "        pass\n"
+)
+
+
+def test_literal_assignment_stays_lazy():
+    result = scan_native_module(HEADER + "    limit = {'a': 1, 'b': (2, 3)}\n" + COMMAND)
+    assert result["lazy"]
+    assert result["commands"] == [{"module": "demo", "pattern": r"^\.demo$", "desc": "Демо"}]
+
+
+def test_name_assignment_is_eager():
+    assert not scan_native_module(HEADER + "    handler = client\n" + COMMAND)["lazy"]
+
+
+def test_call_assignment_is_eager():
+    assert not scan_native_module(HEADER + "    state = load()\n" + COMMAND)["lazy"]
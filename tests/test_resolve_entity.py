@@ -0,0 +1,41 @@
+import time
+import asyncio
+
+from telethon.tl.types import Chat, InputPeerChat, InputPeerUser
+
+from ai import commands
+from ai.dialogs import DialogEntry, DialogIndex
+
+
+class FakeClient:
+    def __init__(self, known):
+        self.known = known
+
+    async def get_input_entity(self, identifier):
+        if identifier in self.known:
+            return self.known[identifier]
+        raise ValueError(identifier)
+
+    async def get_entity(self, identifier):
+        return await self.get_input_entity(identifier)
+
+
+def _index(tmp_path):
+    index = DialogIndex(str(tmp_path / "dialogs.json"))
+    chat = Chat(id=42, title="Durov", photo=None, participants_count=2, date=None, version=1)
+    index._add(DialogEntry.from_entity(chat, time.time()))
+    index.built_at = time.time()
+    return index
+
+
+def test_username_wins_over_dialog_title(tmp_path, monkeypatch):
+    user = InputPeerUser(1, 2)
+    monkeypatch.setattr(commands, "_client", FakeClient({"durov": user}))
+    monkeypatch.setattr(commands, "_dialogs", _index(tmp_path))
+    assert asyncio.run(commands._resolve_entity("durov")) == user
+
+
+def test_dialog_title_used_when_telegram_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(commands, "_client", FakeClient({}))
+    monkeypatch.setattr(commands, "_dialogs", _index(tmp_path))
+    assert asyncio.run(commands._resolve_entity("durov")) == InputPeerChat(42)
@@ -3,19 +3,18 @@ import random
 import os
 import sys
 import asyncio
-import requests
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
 from telethon.tl.custom.message import Message
 from telethon.extensions import html as html_parser
 from faust_tool.core.loader import (
-    load_all_ftg_modules,
-    load_all_native_modules,
-    load_builtin_modules,
+    load_all_modules,
     load_ftg_module,
     load_native_module,
+    format_startup_report,
 )
 from faust_tool.ai import state
+from faust_tool.core import http
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -31,6 +30,7 @@ os.makedirs(FTG_MODULES_DIR, exist_ok=True)
 os.makedirs(SESSION_DIR, exist_ok=True)
 
 SESSION_FILE = os.path.join(SESSION_DIR, "faust.session")
+DOWNLOAD_TIMEOUT = 15
 
 with open(os.path.join(BASE_DIR, "config.json"), encoding="utf-8") as f:
     cfg = json.load(f)
@@ -75,6 +75,13 @@ async def edit_html(self, text=None, **kwargs):
     return await _old_edit(self, text, **kwargs)
 Message.edit = edit_html
 
+class NotAModuleError(Exception):
+    pass
+
+def _reject_html(response):
+    if "text/html" in response.headers.get("Content-Type", ""):
+        raise NotAModuleError()
+
 @client.on(events.NewMessage(pattern=r"^\.dlmod(?:\s+(native))?(?:\s+(.+))?$"))
 async def dlmod_cmd(event: Message):
     args = event.pattern_match.group(2)
@@ -101,12 +108,11 @@ async def dlmod_cmd(event: Message):
             filename += ".py"
         save_path = os.path.join(folder, filename)
 
+        await event.edit(f"Скачиваю `{filename}`...")
         try:
-            r = requests.get(url, timeout=15)
-            if "text/html" in r.headers.get("Content-Type", ""):
-                return await event.edit("Ссылка ведёт не на .py файл.")
-            with open(save_path, "wb") as f:
-                f.write(r.content)
+            await http.download(url, save_path, check=_reject_html, timeout=DOWNLOAD_TIMEOUT)
+        except NotAModuleError:
+            return await event.edit("Ссылка ведёт не на .py файл.")
         except Exception as e:
             return await event.edit(f"Ошибка загрузки файла: {e}")
 
@@ -117,12 +123,22 @@ async def dlmod_cmd(event: Message):
     if module_name in sys.modules:
         del sys.modules[module_name]
 
+    async def progress(text):
+        try:
+            await event.edit(text)
+        except Exception:
+            pass
+
     try:
         if native_flag:
-            load_native_module(save_path, client)
+            mod = await load_native_module(save_path, client, progress)
+        else:
+            mod = await load_ftg_module(save_path, client, progress)
+        if mod is None:
+            return await event.edit(f"Не удалось загрузить модуль `{filename}`, подробности в логах.")
+        if native_flag:
             await event.edit(f"Нативный модуль `{filename}` установлен и перезагружен.")
         else:
-            load_ftg_module(save_path, client)
             await event.edit(f"FTG-модуль `{filename}` установлен и перезагружен.")
     except Exception as e:
         await event.edit(f"Ошибка при загрузке модуля `{filename}`:\n<code>{e}</code>")
@@ -143,14 +159,16 @@ async def main():
     except Exception as e:
         print(f"[FAUST] Ошибка получения аккаунта: {e}")
 
-    load_builtin_modules(client)
-    load_all_native_modules(client)
-    load_all_ftg_modules(client)
+    await load_all_modules(client)
 
+    print(format_startup_report())
     print("[FAUST] Все модули успешно загружены.")
     print("[FAUST] Ожидание событий...")
 
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await http.close()
 
 
 if __name__ == "__main__":